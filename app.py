@@ -4,24 +4,36 @@ import logging
 import time
 import requests
 import stripe
-import uuid
+import numpy as np
+import secrets
 import hashlib
+import hmac
+import mmap
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, date
+from functools import lru_cache
 from typing import List, Dict, Any
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session, make_response
+from flask import Flask, request, jsonify, render_template, redirect, url_for, session, make_response, stream_with_context
 from flask_cors import CORS
 
+try:
+    import orjson
+except Exception:  # stdlib fallback
+    orjson = None
+
 # ----------------------------
 # Matchup grouping / environments
 # ----------------------------
 try:
-    from matchups import group_props_by_matchup
+    from matchups import group_props_by_matchup, bucket_prop, finalize_buckets, new_buckets
 except Exception:
     # minimal fallback: put every prop into "Unknown @ Unknown"
     def group_props_by_matchup(props, league):
         out = {}
         out.setdefault("Unknown @ Unknown", []).extend(props or [])
         return out
+    bucket_prop = finalize_buckets = new_buckets = None
 
 try:
     from environments import compute_environments_for_league
@@ -33,6 +45,10 @@ except Exception:
 # Core odds adapters
 # ----------------------------
 from odds_api import fetch_player_props as fetch_mlb_player_props
+try:
+    from enrichment import prewarm_player_id_index
+except Exception:
+    def prewarm_player_id_index(): return None
 from nfl_odds_api import fetch_nfl_player_props
 from props_ncaaf import fetch_ncaaf_player_props
 from props_ufc import fetch_ufc_totals_props
@@ -41,6 +57,7 @@ from props_ufc import fetch_ufc_totals_props
 # No-vig utils
 # ----------------------------
 from novig import american_to_prob, novig_two_way
+from ev_kernel import compute_ev
 
 # ----------------------------
 # Cache metrics (safe shim)
@@ -98,6 +115,7 @@ except Exception:
 # Universal cache helpers
 # ----------------------------
 from universal_cache import get_or_set_slot, slot_key, set_json, get_json, current_slot
+from http_session import pooled_session
 
 # ----------------------------
 # Optional tolerant import name for legacy overlay
@@ -126,23 +144,77 @@ except Exception:
 log = logging.getLogger("app")
 log.setLevel(logging.INFO)
 
-def _norm_league(s: str = None) -> str:
+_LEAGUE_ALIASES = {
+    "ncaa": "ncaaf",
+    "cfb": "ncaaf",
+    "college_football": "ncaaf",
+    "mma": "ufc",
+    "udc": "ufc",
+}
+
+@lru_cache(maxsize=64)
+def _norm_league(s: str | None = None) -> str:
     t = (s or "").strip().lower()
-    aliases = {
-        "ncaa": "ncaaf",
-        "cfb": "ncaaf",
-        "college_football": "ncaaf",
-        "mma": "ufc",
-        "udc": "ufc",
-    }
-    return aliases.get(t, t)
+    return _LEAGUE_ALIASES.get(t, t)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "mora-bets-secret-key-change-in-production")
 CORS(app)
 
+_ORJSON_OPTS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+def _json(payload, status: int = 200):
+    """jsonify for the big payloads: orjson straight to bytes (numpy arrays allowed)."""
+    if orjson is None:
+        return jsonify(payload), status
+    return app.response_class(orjson.dumps(payload, option=_ORJSON_OPTS),
+                              status=status, mimetype="application/json")
+
+_STREAM_CHUNK = 64 * 1024
+
+def _dumps(v) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(v, option=_ORJSON_OPTS)
+    return json.dumps(v, default=str).encode("utf-8")
+
+def _json_stream(payload: dict, stream_keys=("props", "matchups")):
+    """
+    Streamed _json for the props endpoints: top-level fields are written in
+    order, and the values under stream_keys one element (list) or one entry
+    (dict) at a time, flushed in ~64KB chunks, so the first bytes go out
+    before the whole body is serialized.
+    """
+    def gen():
+        buf = bytearray(b"{")
+        for n, (k, v) in enumerate(payload.items()):
+            if n:
+                buf += b","
+            buf += _dumps(k) + b":"
+            if k in stream_keys and isinstance(v, (list, dict)):
+                is_list = isinstance(v, list)
+                buf += b"[" if is_list else b"{"
+                items = v if is_list else v.items()
+                for i, item in enumerate(items):
+                    if i:
+                        buf += b","
+                    if is_list:
+                        buf += _dumps(item)
+                    else:
+                        buf += _dumps(str(item[0])) + b":" + _dumps(item[1])
+                    if len(buf) >= _STREAM_CHUNK:
+                        yield bytes(buf)
+                        buf.clear()
+                buf += b"]" if is_list else b"}"
+            else:
+                buf += _dumps(v)
+        buf += b"}"
+        yield bytes(buf)
+    return app.response_class(stream_with_context(gen()), mimetype="application/json")
+
 # Stripe configuration
 stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
+# Keep-alive pool for Stripe calls; the SDK does its own retries
+stripe.default_http_client = stripe.RequestsClient(session=pooled_session(retries=0))
 LICENSE_DB = 'license_keys.json'
 PUBLISHABLE_KEY = os.environ.get("STRIPE_PUBLISHABLE_KEY")
 PRICE_MONTHLY = os.environ.get("STRIPE_PRICE_ID_MONTHLY")
@@ -154,6 +226,8 @@ APP_BASE_URL  = os.environ.get("APP_BASE_URL", "http://localhost:5000")
 AI_OVERLAY_ENABLED = os.getenv("AI_OVERLAY_ENABLED", "true").lower() in ("1", "true", "yes")
 AI_MIN_EDGE   = float(os.getenv("AI_MIN_EDGE", "0.06"))   # NOTE: could be 0.06 (fraction) or 6 (percent)
 AI_ATTACH_CAP = int(os.getenv("AI_ATTACH_CAP", "120"))
+# AI_MIN_EDGE <= 1 is a fraction (0.06 -> 6.0 pp), otherwise already percent points
+_EDGE_THR_PP = (AI_MIN_EDGE * 100.0) if AI_MIN_EDGE <= 1.0 else AI_MIN_EDGE
 
 # Legacy price lookup
 PRICE_LOOKUP = {
@@ -168,7 +242,7 @@ PRICE_LOOKUP = {
 def _perf_begin():
     want = getattr(perf, "PERF_DEFAULT", False) or (request.args.get("trace") == "1")
     if want:
-        rid = request.headers.get("X-Request-ID") or str(uuid.uuid4())[:8]
+        rid = request.headers.get("X-Request-ID") or secrets.token_hex(4)
         perf.enable(request_id=f"{request.path}:{rid}")
         perf.kv("path", request.path)
         perf.kv("query", request.query_string.decode("utf-8"))
@@ -281,6 +355,56 @@ def create_checkout_session():
 # -----------------------------------------------------------------------------
 # License verification
 # -----------------------------------------------------------------------------
+_MASTER_KEY = b"mora-king"
+_LICENSE_CACHE: Dict[str, Any] = {"sig": None, "data": {}, "upper": {}}
+_LICENSE_LOCK = threading.RLock()
+
+def _upper_keys(data: Dict[str, Any]) -> Dict[str, Any]:
+    upper: Dict[str, Any] = {}
+    for k, v in data.items():
+        if v or k.upper() not in upper:
+            upper[k.upper()] = v
+    return upper
+
+def _read_license_db() -> tuple[tuple[int, int], Dict[str, Any]]:
+    """(mtime_ns, size) signature + parsed license_keys.json, read through an mmap of the fd."""
+    fd = os.open(LICENSE_DB, os.O_RDONLY)
+    try:
+        st = os.fstat(fd)
+        if not st.st_size:
+            raise ValueError(f"{LICENSE_DB} is empty")
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+            data = json.loads(mm[:])
+    finally:
+        os.close(fd)
+    return (st.st_mtime_ns, st.st_size), data
+
+def _load_keys() -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    license_keys.json parsed once and re-read only when its mtime/size change.
+    Returns (keys, upper) where upper maps KEY.upper() -> value for O(1)
+    case-insensitive lookups. Raises if the file can't be read.
+    """
+    st = os.stat(LICENSE_DB)
+    if (st.st_mtime_ns, st.st_size) != _LICENSE_CACHE["sig"]:
+        with _LICENSE_LOCK:
+            # another thread may have reloaded while we waited
+            st = os.stat(LICENSE_DB)
+            if (st.st_mtime_ns, st.st_size) != _LICENSE_CACHE["sig"]:
+                sig, data = _read_license_db()
+                _LICENSE_CACHE.update(sig=sig, data=data, upper=_upper_keys(data))
+    return _LICENSE_CACHE["data"], _LICENSE_CACHE["upper"]
+
+def _save_keys(data: Dict[str, Any]) -> None:
+    """Atomically replace license_keys.json (temp file + os.replace) and refresh the cache in place."""
+    with _LICENSE_LOCK:
+        tmp = f"{LICENSE_DB}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_dumps(data))
+        os.replace(tmp, LICENSE_DB)
+        st = os.stat(LICENSE_DB)
+        _LICENSE_CACHE.update(sig=(st.st_mtime_ns, st.st_size), data=data, upper=_upper_keys(data))
+
 @app.route("/verify")
 def verify():
     session_id = request.args.get('session_id')
@@ -297,15 +421,9 @@ def verify():
         customer_email = sess.customer_details.email or "unknown@example.com"
         customer_name  = sess.customer_details.name or 'user'
         last = customer_name.split()[-1].lower()
-        suffix = str(uuid.uuid4().int)[-4:]
+        suffix = f"{int.from_bytes(os.urandom(2), 'big') % 10000:04d}"
         key = f'{last}{suffix}'
 
-        try:
-            with open(LICENSE_DB, 'r') as f:
-                keys = json.load(f)
-        except:
-            keys = {}
-
         line_items = sess.get('line_items', {}).get('data', [])
         is_mora_assist = False
         if line_items:
@@ -317,9 +435,14 @@ def verify():
             log.info(f"✅ Mora Assist purchase confirmed: {customer_email}, Phone: {phone_number}")
             return render_template('verify.html', mora_assist=True, email=customer_email, phone=phone_number)
         else:
-            keys[key] = {'email': customer_email, 'plan': sess.mode}
-            with open(LICENSE_DB, 'w') as f:
-                json.dump(keys, f)
+            # read-modify-write under the license lock so concurrent checkouts don't drop keys
+            with _LICENSE_LOCK:
+                try:
+                    keys = dict(_load_keys()[0])
+                except Exception:
+                    keys = {}
+                keys[key] = {'email': customer_email, 'plan': sess.mode}
+                _save_keys(keys)
             log.info(f"✅ Generated license key for {customer_email}: {key}")
             return render_template('verify.html', key=key)
 
@@ -331,20 +454,19 @@ def verify():
 def verify_key():
     user_key = request.args.get('key', '').strip()
     try:
-        with open(LICENSE_DB, 'r') as f:
-            keys = json.load(f)
+        _, upper = _load_keys()
     except Exception as e:
         log.error(f"Error loading license keys: {e}")
         return jsonify({'valid': False})
 
-    is_valid = any(k.upper() == user_key.upper() and keys[k] for k in keys)
+    is_valid = bool(upper.get(user_key.upper()))
     log.info(f"Key verification for '{user_key}': {'Valid' if is_valid else 'Invalid'}")
     return jsonify({'valid': is_valid})
 
 @app.route("/validate-key", methods=["POST"])
 def validate_key():
     user_key = request.form.get('key', '').strip().lower()
-    if user_key == 'mora-king':
+    if hmac.compare_digest(user_key.encode("utf-8"), _MASTER_KEY):
         session["licensed"] = True
         session["license_key"] = user_key
         session["access_level"] = "creator"
@@ -352,8 +474,7 @@ def validate_key():
         return jsonify({'valid': True, 'redirect': url_for('dashboard')})
 
     try:
-        with open(LICENSE_DB, 'r') as f:
-            keys = json.load(f)
+        keys, _ = _load_keys()
     except:
         return jsonify({'valid': False})
 
@@ -374,13 +495,12 @@ def dashboard():
     user_key = request.args.get('key', '').strip()
     if user_key:
         try:
-            with open(LICENSE_DB, 'r') as f:
-                keys = json.load(f)
+            _, upper = _load_keys()
         except Exception as e:
             log.error(f"Error loading license keys: {e}")
             return redirect(url_for('index') + '?message=System+error.+Please+try+again.')
 
-        is_valid = any(k.upper() == user_key.upper() and keys[k] for k in keys)
+        is_valid = bool(upper.get(user_key.upper()))
         if not is_valid:
             log.info(f"Invalid key attempt: {user_key}")
             return redirect(url_for('index') + '?message=Invalid+key.+Please+try+again.')
@@ -402,13 +522,12 @@ def dashboard_legacy():
     user_key = request.args.get('key', '').strip()
     if user_key:
         try:
-            with open(LICENSE_DB, 'r') as f:
-                keys = json.load(f)
+            _, upper = _load_keys()
         except Exception as e:
             log.error(f"Error loading license keys: {e}")
             return redirect(url_for('index') + '?message=System+error.+Please+try+again.')
 
-        is_valid = any(k.upper() == user_key.upper() and keys[k] for k in keys)
+        is_valid = bool(upper.get(user_key.upper()))
         if not is_valid:
             log.info(f"Invalid key attempt: {user_key}")
             return redirect(url_for('index') + '?message=Invalid+key.+Please+try+again.')
@@ -428,16 +547,18 @@ def dashboard_legacy():
 # -----------------------------------------------------------------------------
 # License protection
 # -----------------------------------------------------------------------------
+_PUBLIC_ENDPOINTS = frozenset({
+    "home", "how_it_works", "paywall", "paywall_config", "tool",
+    "verify", "verify_key", "validate_key", "create_checkout_session",
+    "healthz", "ping", "static", "logout", "dashboard", "dashboard_legacy",
+    "ai_edge_scout", "cron_prewarm", "api_league_props", "api_environment",
+    "api_trends_l10", "api_ai_scout", "player_props_legacy"
+})
+_PUBLIC_PREFIXES = ("/static", "/api/")
+
 @app.before_request
 def require_license():
-    public_endpoints = [
-        "home", "how_it_works", "paywall", "paywall_config", "tool",
-        "verify", "verify_key", "validate_key", "create_checkout_session",
-        "healthz", "ping", "static", "logout", "dashboard", "dashboard_legacy",
-        "ai_edge_scout", "cron_prewarm", "api_league_props", "api_environment",
-        "api_trends_l10", "api_ai_scout", "player_props_legacy"
-    ]
-    if request.endpoint in public_endpoints or request.path.startswith("/static") or request.path.startswith("/api/"):
+    if request.endpoint in _PUBLIC_ENDPOINTS or request.path.startswith(_PUBLIC_PREFIXES):
         return
     if not session.get("licensed"):
         return redirect(url_for("paywall"))
@@ -445,54 +566,41 @@ def require_license():
 # -----------------------------------------------------------------------------
 # Fetch helper (DRY)
 # -----------------------------------------------------------------------------
+# league -> fetcher(date_str); add NBA/NHL here when ready
+_LEAGUE_FETCHERS = {
+    "mlb":   lambda d: fetch_mlb_player_props(),
+    "nfl":   lambda d: fetch_nfl_player_props(hours_ahead=96),
+    "ncaaf": lambda d: fetch_ncaaf_player_props(date=d),
+    "ufc":   lambda d: fetch_ufc_totals_props(date_iso=d, hours_ahead=96),
+}
+
 def get_player_props_for_league(league: str, *, date_str: str | None = None, nocache: bool = False):
     league = _norm_league(league or "mlb")
-
-    if league == "mlb":
-        if nocache:
-            props = fetch_mlb_player_props()
-            set_json(slot_key("props", "mlb"), props)
-        else:
-            props = get_or_set_slot("props", "mlb", fetch_mlb_player_props)
-        return props
-
-    if league == "nfl":
-        if nocache:
-            props = fetch_nfl_player_props(hours_ahead=96)
-            set_json(slot_key("props", "nfl"), props)
-        else:
-            props = get_or_set_slot("props", "nfl", fetch_nfl_player_props)
-        return props
-
-    if league == "ncaaf":
-        if nocache:
-            props = fetch_ncaaf_player_props(date=date_str)
-            set_json(slot_key("props", "ncaaf"), props)
-        else:
-            props = get_or_set_slot("props", "ncaaf", lambda: fetch_ncaaf_player_props(date=date_str))
-        return props
-
-    if league == "ufc":
-        if nocache:
-            props = fetch_ufc_totals_props(date_iso=date_str, hours_ahead=96)
-            set_json(slot_key("props", "ufc"), props)
-        else:
-            props = get_or_set_slot("props", "ufc", lambda: fetch_ufc_totals_props(date_iso=date_str, hours_ahead=96))
+    fn = _LEAGUE_FETCHERS.get(league)
+    if fn is None:
+        return []
+    if nocache:
+        props = fn(date_str)
+        set_json(slot_key("props", league), props)
         return props
-
-    # TODO: add NBA/NHL fetchers when ready
-    return []
+    return get_or_set_slot("props", league, lambda: fn(date_str))
 
 # -----------------------------------------------------------------------------
 # Contextual + no-vig EV enrichment (Bets5 style)
 # -----------------------------------------------------------------------------
-def _ctx_rate_fraction(player: str | None, stat: str | None, point: float | str | None, league: str) -> float | None:
+@lru_cache(maxsize=8192)
+def _ctx_cached(player, stat, point, league: str, slot=None):
+    """get_contextual_hit_rate memoized per cache slot (slot = current_slot()'s boundary)."""
+    return get_contextual_hit_rate(player, stat, point, league)
+
+def _ctx_rate_fraction(player: str | None, stat: str | None, point: float | str | None, league: str, slot=None) -> float | None:
     """
     Call Bets5 contextual model. It may return 0..1 or 0..100.
     Normalize to 0..1. Return None if unavailable.
+    Lookups are reused within the same slot (over/under/alt-line rows share them).
     """
     try:
-        r = get_contextual_hit_rate(player, stat, point, league)
+        r = _ctx_cached(player, stat, point, league, slot)
         if r is None:
             return None
         r = float(r)
@@ -500,39 +608,45 @@ def _ctx_rate_fraction(player: str | None, stat: str | None, point: float | str
     except Exception:
         return None
 
-def _price_from(prop, key_name):
-    """Accept numbers or dict like {'price': -120}."""
-    v = prop.get(key_name)
-    if isinstance(v, dict):
-        return v.get("price") or v.get("odds")
-    return v
-
-def _compute_fair_probs(prop):
-    """Build fair (no-vig) probabilities from over/under American odds."""
-    over = _price_from(prop, "over")  or prop.get("over_odds")
-    under = _price_from(prop, "under") or prop.get("under_odds")
-    try:
-        po = american_to_prob(float(over))   if over  is not None else None
-        pu = american_to_prob(float(under))  if under is not None else None
-        if po is None or pu is None:
-            return None, None
-        s = po + pu
-        if s <= 0:
-            return None, None
-        return po/s, pu/s
-    except Exception:
-        return None, None
+_NAN = float("nan")
+
+def _odds_side(v, alt, _get=dict.get) -> float:
+    """
+    One side's American odds as float, with the same `or` fallbacks as the
+    scalar path: dict -> price or odds, then falsy (None/0) -> alt;
+    missing/0/invalid -> NaN.
+    """
+    if v.__class__ is dict:
+        v = _get(v, "price") or _get(v, "odds")
+    v = v or alt
+    if v.__class__ is not float:
+        if v is None:
+            return _NAN
+        try:
+            v = float(v)
+        except (TypeError, ValueError):
+            return _NAN
+    return v if v else _NAN
 
-def _edge_threshold_pp() -> float:
+def _odds_pair(prop, _get=dict.get) -> tuple[float, float]:
     """
-    Interpret AI_MIN_EDGE env:
-      - if <= 1, treat as fraction (e.g., 0.06 -> 6.0 pp)
-      - else already percent points (e.g., 6 -> 6.0 pp)
+    Raw over/under American odds as floats for the vectorized fair-prob path.
+    Missing or invalid sides (0 odds included) come back as NaN.
     """
-    v = AI_MIN_EDGE
-    return (v * 100.0) if v <= 1.0 else v
+    return (_odds_side(_get(prop, "over"), _get(prop, "over_odds")),
+            _odds_side(_get(prop, "under"), _get(prop, "under_odds")))
+
+_PICKS = {1: "OVER", -1: "UNDER", 0: None}
+
+def _put_prob(p, key, over, under):
+    """p[key]['prob'] = {over, under}; builds literals, merging only if the row already carries p[key]."""
+    prev = p.get(key)
+    if prev:
+        p[key] = {**prev, "prob": {**(prev.get("prob") or {}), "over": over, "under": under}}
+    else:
+        p[key] = {"prob": {"over": over, "under": under}}
 
-def enrich_with_context_and_edge(rows, league: str):
+def enrich_with_context_and_edge(rows, league: str, on_prop=None):
     """
     For each raw prop:
       - compute fair (no-vig) prob
@@ -540,52 +654,120 @@ def enrich_with_context_and_edge(rows, league: str):
       - compute EV edge = contextual - fair
       - attach results under 'fair', 'contextual', 'ai'
     Returns a NEW list of props ready for FE.
+
+    Odds and contextual rates are gathered into float64 columns in one pass,
+    the fair/edge math runs in ev_kernel.compute_ev, then results are scattered back.
+    on_prop(p), if given, is called on each finished prop during that scatter loop.
     """
-    thr = _edge_threshold_pp()
+    thr = _EDGE_THR_PP
+    rows = rows or []
+    n = len(rows)
     out = []
-    for r in rows:
+    players, stats, points = [], [], []
+    over_arr = np.empty(n, dtype=np.float64)
+    under_arr = np.empty(n, dtype=np.float64)
+
+    for i, r in enumerate(rows):
         p = dict(r)  # shallow copy
 
         # Normalize common fields we might need
-        p.setdefault("stat", p.get("stat_type"))
-        p.setdefault("point", p.get("line", p.get("point")))
-        p.setdefault("player", p.get("player_name") or p.get("fighter") or p.get("fighter_a"))
-
-        # 1) fair probs (no-vig)
-        fo, fu = _compute_fair_probs(p)
-        if fo is not None and fu is not None:
-            p.setdefault("fair", {}).setdefault("prob", {})
-            p["fair"]["prob"]["over"] = fo
-            p["fair"]["prob"]["under"] = fu
-
-        # 2) contextual (Bets5)
-        c_over = _ctx_rate_fraction(p.get("player"), p.get("stat"), p.get("point"), league)
-        if c_over is not None:
-            p.setdefault("contextual", {}).setdefault("prob", {})
-            p["contextual"]["prob"]["over"]  = c_over
-            p["contextual"]["prob"]["under"] = 1.0 - c_over
-
-        # 3) edge (only if we have both)
-        p.setdefault("ai", {})
-        if fo is not None and c_over is not None:
-            edge_over  = (c_over - fo) * 100.0
-            edge_under = -edge_over  # since fu = 1-fo, cu = 1-c_over
-            p["ai"]["edge_over"]  = round(edge_over, 1)
-            p["ai"]["edge_under"] = round(edge_under, 1)
+        if "stat" not in p:
+            p["stat"] = p.get("stat_type")
+        if "point" not in p:
+            p["point"] = p.get("line")
+        if "player" not in p:
+            p["player"] = p.get("player_name") or p.get("fighter") or p.get("fighter_a")
+
+        over_arr[i], under_arr[i] = _odds_pair(p)
+        players.append(p.get("player")); stats.append(p.get("stat")); points.append(p.get("point"))
+        out.append(p)
+
+    # 1) contextual (Bets5)
+    slot = current_slot()[1]
+    c_over = np.fromiter(
+        (np.nan if c is None else c for c in map(_ctx_rate_fraction, players, stats, points, [league] * n, [slot] * n)),
+        dtype=np.float64, count=n,
+    )
+
+    # 2) fair probs (no-vig) + 3) edge, in one compiled pass
+    fo = np.empty(n, dtype=np.float64)
+    fu = np.empty(n, dtype=np.float64)
+    edge_over = np.empty(n, dtype=np.float64)
+    pick = np.empty(n, dtype=np.int8)
+    compute_ev(over_arr, under_arr, c_over, thr, fo, fu, edge_over, pick)
+    edge_over_r = np.round(edge_over, 1)
+    edge_under_r = np.round(-edge_over, 1)
+
+    has_fair = ~np.isnan(fo)
+    has_ctx = ~np.isnan(c_over)
+    fo_l, fu_l, c_l = fo.tolist(), fu.tolist(), c_over.tolist()
+    eo_l, eu_l, pick_l = edge_over_r.tolist(), edge_under_r.tolist(), pick.tolist()
+    for i, p in enumerate(out):
+        if has_fair[i]:
+            _put_prob(p, "fair", fo_l[i], fu_l[i])
+        if has_ctx[i]:
+            _put_prob(p, "contextual", c_l[i], 1.0 - c_l[i])
+        if has_fair[i] and has_ctx[i]:
             # Pick side if sizable threshold met
-            if edge_over >= thr:
-                p["ai"]["pick"] = "OVER"
-            elif edge_under >= thr:
-                p["ai"]["pick"] = "UNDER"
-            else:
-                p["ai"]["pick"] = None
+            ai = {"edge_over": eo_l[i], "edge_under": eu_l[i], "pick": _PICKS[pick_l[i]]}
         else:
-            p["ai"]["edge_over"] = p["ai"]["edge_under"] = None
-            p["ai"]["pick"] = None
-
-        out.append(p)
+            ai = {"edge_over": None, "edge_under": None, "pick": None}
+        prev = p.get("ai")
+        p["ai"] = {**prev, **ai} if prev else ai
+        if on_prop is not None:
+            on_prop(p)
     return out
 
+def enrich_and_group_cached(rows, league: str, *, nocache: bool = False):
+    """
+    enrich_and_group, content-addressed: the output is cached for the slot
+    under a blake2b digest of the input rows, so unchanged rows skip both
+    enrichment and grouping. The grouping is stored as label -> indices into
+    the cached props (props already carry their "matchup" label).
+    """
+    digest = hashlib.blake2b(_dumps(rows or []), digest_size=16).hexdigest()
+    key = slot_key("props_enriched", league, suffix=digest)
+    cached = None if nocache else get_json(key)
+    if cached:
+        props = cached["props"]
+        return props, {label: [props[i] for i in idx] for label, idx in cached["idx"].items()}
+
+    props, grouped = enrich_and_group(rows, league)
+    try:
+        pos = {id(p): i for i, p in enumerate(props)}
+        set_json(key, {"props": props, "idx": {label: [pos[id(p)] for p in ps] for label, ps in grouped.items()}})
+    except Exception as e:
+        log.warning("props_enriched cache write failed: %s", e)
+    return props, grouped
+
+def _environments(league: str) -> Dict[str, Any]:
+    """compute_environments_for_league, computed once per slot."""
+    return get_or_set_slot("environments", league, lambda: compute_environments_for_league(league) or {})
+
+def enrich_and_group(rows, league: str):
+    """
+    enrich_with_context_and_edge + group_props_by_matchup in one walk over the
+    props: each prop is bucketed by event as soon as it is enriched, so only
+    the (few) event buckets are visited again to resolve labels.
+    Returns (props, grouped); grouped is {} if labeling fails.
+    """
+    if bucket_prop is None:
+        props = enrich_with_context_and_edge(rows, league)
+        try:
+            return props, group_props_by_matchup(props, league)
+        except Exception as e:
+            log.exception("group_props_by_matchup failed: %s", e)
+            return props, {}
+
+    by_event = new_buckets()
+    props = enrich_with_context_and_edge(rows, league, on_prop=lambda p: bucket_prop(by_event, p))
+    try:
+        grouped = finalize_buckets(by_event, league)
+    except Exception as e:
+        log.exception("group_props_by_matchup failed: %s", e)
+        grouped = {}
+    return props, grouped
+
 # -----------------------------------------------------------------------------
 # Unified props API (enrich once, group once, add environments)
 # -----------------------------------------------------------------------------
@@ -598,30 +780,23 @@ def api_league_props(league):
     # 1) Fetch
     rows = get_player_props_for_league(league, date_str=date_str, nocache=nocache)
 
-    # 2) Enrich ONCE — Bets5 contextual + no-vig EV
-    props = enrich_with_context_and_edge(rows, league)
+    # 2+3) Enrich ONCE — Bets5 contextual + no-vig EV — and group (Bets5-style, reused per slot)
+    props, grouped = enrich_and_group_cached(rows, league, nocache=nocache)
 
     # (Optional) Add GPT blurbs AFTER edges (won’t overwrite edge numbers if your fn only adds reasons)
     # try:
-    #     attach_ai_edges(props, min_edge=_edge_threshold_pp(), cap=AI_ATTACH_CAP)
+    #     attach_ai_edges(props, min_edge=_EDGE_THR_PP, cap=AI_ATTACH_CAP)
     # except Exception:
     #     pass
 
-    # 3) Group (Bets5-style)
-    try:
-        grouped = group_props_by_matchup(props, league)
-    except Exception as e:
-        log.exception("group_props_by_matchup failed: %s", e)
-        grouped = {}
-
     # 4) Environments (safe if empty)
     try:
-        env_map = compute_environments_for_league(league) or {}
+        env_map = _environments(league)
     except Exception as e:
         log.exception("compute_environments_for_league failed: %s", e)
         env_map = {}
 
-    return jsonify({
+    return _json_stream({
         "league": league,
         "date": date_str,
         "count": len(props),
@@ -639,14 +814,13 @@ def player_props_legacy():
     nocache  = (request.args.get("nocache") == "1")
 
     rows = get_player_props_for_league(lg, date_str=date_str, nocache=nocache)
-    props = enrich_with_context_and_edge(rows, lg)
-    grouped = group_props_by_matchup(props, lg)
+    props, grouped = enrich_and_group_cached(rows, lg, nocache=nocache)
     try:
-        env_map = compute_environments_for_league(lg) or {}
+        env_map = _environments(lg)
     except Exception:
         env_map = {}
 
-    return jsonify({
+    return _json_stream({
         "league": lg, "date": date_str, "count": len(props),
         "props": props, "matchups": grouped, "environments": env_map,
         "enrichment_applied": True
@@ -656,9 +830,14 @@ def player_props_legacy():
 @app.route("/api/<league>/environment")
 def api_environment(league):
     try:
-        return jsonify({"environments": compute_environments_for_league(_norm_league(league)) or {}})
+        return _json({"environments": _environment_payload(_norm_league(league))})
     except Exception:
-        return jsonify({"environments": {}})
+        return _json({"environments": {}})
+
+@cache_ttl(seconds=60)
+def _environment_payload(league: str) -> Dict[str, Any]:
+    # per-league memo in front of the slot cache; raises (not cached) on failure
+    return _environments(league)
 
 # -----------------------------------------------------------------------------
 # AI endpoints (kept)
@@ -707,7 +886,7 @@ def api_ai_scout():
         return jsonify({"error": f"Unsupported league: {league}"}), 400
 
     try:
-        attach_ai_edges(props, min_edge=_edge_threshold_pp(), cap=AI_ATTACH_CAP)
+        attach_ai_edges(props, min_edge=_EDGE_THR_PP, cap=AI_ATTACH_CAP)
     except Exception:
         pass
 
@@ -717,9 +896,12 @@ def api_ai_scout():
 # -----------------------------------------------------------------------------
 # Health & utils
 # -----------------------------------------------------------------------------
+_HEALTHZ_BODY = b'{"ok":true}\n'
+
 @app.route("/healthz")
 def healthz():
-    return jsonify({"ok": True})
+    # constant body, built once; probe floods skip jsonify entirely
+    return app.response_class(_HEALTHZ_BODY, mimetype="application/json")
 
 @app.route("/ping")
 def ping():
@@ -732,33 +914,49 @@ def cron_prewarm():
         return jsonify({"error":"unauthorized"}), 401
 
     leagues = [l.strip() for l in (request.args.get("leagues","mlb,nfl,ncaaf,ufc").split(",")) if l.strip()]
+    def _fetch_mlb():
+        # build the player-id name index here, off the user request path
+        try:
+            prewarm_player_id_index()
+        except Exception as e:
+            out["mlb_player_index"] = f"error: {e}"
+        return fetch_mlb_player_props()
+
     out = {}
+    fetchers = {
+        "mlb":   _fetch_mlb,
+        "nfl":   fetch_nfl_player_props,
+        "ncaaf": fetch_ncaaf_player_props,
+        "ufc":   lambda: fetch_ufc_totals_props(hours_ahead=96),
+    }
+    jobs = {}
     for L in leagues:
         L = _norm_league(L)
-        try:
-            if L == "mlb":
-                props = fetch_mlb_player_props()
-                set_json(slot_key("props", "mlb"), props)
+        if L in fetchers:
+            jobs[L] = fetchers[L]
+        else:
+            out[L] = "skipped: unsupported"
+
+    # Independent network-bound fetches: run them side by side
+    if jobs:
+        with ThreadPoolExecutor(max_workers=len(jobs)) as ex:
+            futs = {ex.submit(fn): L for L, fn in jobs.items()}
+            for fut in as_completed(futs):
+                L = futs[fut]
                 try:
-                    from openai import OpenAI
-                    from ai_scout import scout_cached_for_league
-                    client = OpenAI()
-                    _ = scout_cached_for_league(client, props, league="mlb", top_k=30, force_refresh=True)
+                    props = fut.result()
+                    set_json(slot_key("props", L), props)
                 except Exception as e:
-                    out["mlb_ai"] = f"error: {e}"
-            elif L == "nfl":
-                props = fetch_nfl_player_props()
-                set_json(slot_key("props", "nfl"), props)
-            elif L == "ncaaf":
-                props = fetch_ncaaf_player_props()
-                set_json(slot_key("props", "ncaaf"), props)
-            elif L == "ufc":
-                props = fetch_ufc_totals_props(hours_ahead=96)
-                set_json(slot_key("props", "ufc"), props)
-            else:
-                out[L] = "skipped: unsupported"
-        except Exception as e:
-            out[L] = f"error: {e}"
+                    out[L] = f"error: {e}"
+                    continue
+                if L == "mlb":
+                    try:
+                        from openai import OpenAI
+                        from ai_scout import scout_cached_for_league
+                        client = OpenAI()
+                        _ = scout_cached_for_league(client, props, league="mlb", top_k=30, force_refresh=True)
+                    except Exception as e:
+                        out["mlb_ai"] = f"error: {e}"
 
     out["status"] = "ok"
     return jsonify(out)
@@ -1,66 +1,344 @@
 # cache_ttl.py
 from __future__ import annotations
-import os, time, json
-from typing import Any, Optional
+import os, time, json, functools, heapq, itertools, threading, logging
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    _OPTS = orjson.OPT_NON_STR_KEYS  # stdlib json stringifies non-str keys too
+    def _dumps(v: Any) -> bytes: return orjson.dumps(v, option=_OPTS)
+    _loads = orjson.loads             # takes str or bytes
+except Exception:  # stdlib fallback
+    # json.dumps builds a fresh JSONEncoder whenever separators are passed; build it once
+    _JSON_ENC = json.JSONEncoder(separators=(",", ":"))
+    def _dumps(v: Any, _encode=_JSON_ENC.encode) -> bytes: return _encode(v).encode("utf-8")
+    _loads = json.loads
+
+# Wire format: msgpack when msgspec is available (smaller + faster than JSON).
+# msgpack entries live under "mp:"-prefixed keys so JSON entries written
+# before the switch are never handed to the msgpack decoder.
+try:
+    import msgspec
+    # One Encoder/Decoder per process: the encoder reuses its internal buffer
+    _enc = msgspec.msgpack.Encoder()
+    _dec = msgspec.msgpack.Decoder()
+    _KEY_PREFIX = "mp:"
+    _pack = _enc.encode
+    def _unpack(s: bytes, _decode=_dec.decode) -> Any:
+        try:
+            return _decode(s)
+        except msgspec.DecodeError:
+            return _loads(s)
+except Exception:
+    _KEY_PREFIX = ""
+    _pack = _dumps
+    _unpack = _loads
+
+# Payloads over CACHE_COMPRESS_MIN bytes are compressed (zstd if installed,
+# else zlib). Every stored value carries a one-byte tag: 0 raw, 1 zstd, 2 zlib.
+# Tagged entries live under a "z:" key prefix so untagged ones are never misread.
+import zlib
+_COMPRESS_MIN = int(os.getenv("CACHE_COMPRESS_MIN", "1024"))
+_RAW, _ZSTD, _ZLIB = 0, 1, 2
+try:
+    import zstandard
+    _zc = zstandard.ZstdCompressor(level=3)
+    _zd = zstandard.ZstdDecompressor()
+    _CTAG, _compress = bytes((_ZSTD,)), _zc.compress
+except Exception:
+    _zd = None
+    _CTAG, _compress = bytes((_ZLIB,)), functools.partial(zlib.compress, level=6)
+_KEY_PREFIX += "z:"
+_encode, _decode = _pack, _unpack
+
+def _frame(raw: bytes) -> bytes:
+    if len(raw) > _COMPRESS_MIN:
+        return _CTAG + _compress(raw)
+    return b"\x00" + raw
+
+def _unframe(s: bytes) -> bytes:
+    tag = s[0]
+    if tag == _RAW:
+        return s[1:]
+    if tag == _ZSTD and _zd is not None:
+        return _zd.decompress(s[1:])
+    if tag == _ZLIB:
+        return zlib.decompress(s[1:])
+    raise ValueError(f"cache_ttl: unreadable payload tag {tag}")
+
+def _pack(value: Any, _encode=_encode) -> bytes:
+    return _frame(_encode(value))
+
+def _unpack(s: bytes, _decode=_decode) -> Any:
+    return _decode(_unframe(s))
 
 _REDIS_URL = os.getenv("REDIS_URL") or os.getenv("UPSTASH_REDIS_REST_URL")
 _USE_REDIS = False
 _r = None
+_PARSER = None  # "hiredis" | "python" once a client exists
 
 if _REDIS_URL:
     try:
         import redis  # pip install redis
-        _r = redis.from_url(_REDIS_URL, decode_responses=True)
+        # Bounded, shared pool (redis-py sets TCP_NODELAY on its sockets); bytes in/out
+        # so values go straight to _unpack
+        _pool = redis.BlockingConnectionPool.from_url(
+            _REDIS_URL,
+            max_connections=int(os.getenv("REDIS_POOL_MAX", "32")),
+            socket_keepalive=True,
+            socket_timeout=1.0,
+            health_check_interval=30,
+        )
+        _r = redis.Redis(connection_pool=_pool, single_connection_client=False)
         _USE_REDIS = True
+        # redis-py picks the hiredis C parser by itself when hiredis is installed
+        try:
+            from redis.utils import HIREDIS_AVAILABLE
+            _PARSER = "hiredis" if HIREDIS_AVAILABLE else "python"
+            if not HIREDIS_AVAILABLE:
+                logger.info("[cache_ttl] hiredis not installed; redis-py is using the pure-Python RESP parser")
+        except Exception:
+            pass
     except Exception:
         _r = None
         _USE_REDIS = False
 
-_mem: dict[str, tuple[float, str]] = {}
+# Circuit breaker: after _BREAKER_FAILS consecutive Redis errors, skip Redis
+# (straight to _mem) for _BREAKER_OPEN_SEC instead of paying socket_timeout per call
+_BREAKER_FAILS = int(os.getenv("REDIS_BREAKER_FAILS", "5"))
+_BREAKER_OPEN_SEC = float(os.getenv("REDIS_BREAKER_OPEN_SEC", "30"))
+_fail_count = 0
+_fail_until = 0.0
+
+def _redis_ok() -> bool:
+    return _USE_REDIS and _r is not None and (not _fail_until or time.monotonic() >= _fail_until)
+
+def _redis_failed() -> None:
+    global _fail_count, _fail_until
+    _fail_count += 1
+    if _fail_count >= _BREAKER_FAILS:
+        _fail_until = time.monotonic() + _BREAKER_OPEN_SEC
+        _fail_count = 0
+
+def _redis_recovered() -> None:
+    global _fail_count, _fail_until
+    _fail_count = 0
+    _fail_until = 0.0
+
+_mem: dict[str, tuple[float, bytes]] = {}
+
+# Min-heap of (exp, key) for _mem so keys that are never read again still get
+# evicted. Lazy deletion: a popped entry whose exp no longer matches _mem[key]
+# (rewritten or already gone) is just discarded.
+_exp_heap: list[tuple[float, str]] = []
+_SWEEP_EVERY = 64      # full-budget sweep every N _mem writes
+_mem_writes = itertools.count(1)
+
+def _sweep(budget: int = 32) -> None:
+    now = time.monotonic()
+    while budget > 0 and _exp_heap and _exp_heap[0][0] <= now:
+        try:
+            exp, key = heapq.heappop(_exp_heap)
+        except IndexError:  # raced with another thread
+            break
+        tup = _mem.get(key)
+        if tup is not None and tup[0] == exp:
+            _mem.pop(key, None)
+        budget -= 1
+
+def _mem_put(key: str, exp: float, s: bytes) -> None:
+    _mem[key] = (exp, s)
+    heapq.heappush(_exp_heap, (exp, key))
+    _sweep(32 if next(_mem_writes) % _SWEEP_EVERY == 0 else 8)
+
+# L1: bounded LRU of encoded (uncompressed) payloads in front of Redis/_mem
+# (expiry on time.monotonic). Hits skip the round trip and decompression but
+# still decode, so every get() hands out a fresh object callers may mutate.
+# Expired entries are dropped lazily when touched.
+_L1: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+_L1_MAX = int(os.getenv("CACHE_L1_MAX", "4096"))
+_MISSING = object()
+
+def _l1_put(key: str, exp: float, raw: bytes) -> None:
+    _L1[key] = (exp, raw)
+    _L1.move_to_end(key)
+    while len(_L1) > _L1_MAX:
+        try:
+            _L1.popitem(last=False)
+        except KeyError:  # raced with another thread
+            break
+
+def _l1_get(key: str) -> Any:
+    tup = _L1.get(key)
+    if tup is None:
+        return _MISSING
+    if tup[0] <= time.monotonic():
+        _L1.pop(key, None)
+        return _MISSING
+    try:
+        _L1.move_to_end(key)
+    except KeyError:
+        pass
+    return tup[1]
+
+# counters: plain ints under one lock (a bare `x += 1` can lose increments
+# across threads)
+_stats = {"hits": 0, "miss": 0, "sets": 0}
+_stats_lock = threading.Lock()
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
 
-# counters
-_hits = 0
-_miss = 0
-_sets = 0
 def metrics():  # for /_perf/recent inspection
-    return {"hits": _hits, "miss": _miss, "sets": _sets}
+    with _stats_lock:
+        out = dict(_stats)
+    out["parser"] = _PARSER
+    return out
 
-def setex(key: str, ttl_sec: int, value: Any) -> None:
-    global _sets; _sets += 1
-    s = json.dumps(value, separators=(",", ":"))
-    if _USE_REDIS and _r:
+# setex/get bind the codec and clock as keyword-only defaults (fast locals
+# instead of global/attribute lookups on every call)
+def setex(key: str, ttl_sec: int, value: Any, *, _encode=_encode, _now=time.monotonic) -> None:
+    _count("sets")
+    key = _KEY_PREFIX + key
+    raw = _encode(value)
+    s = _frame(raw)
+    exp = _now() + ttl_sec
+    _l1_put(key, exp, raw)
+    if _redis_ok():
         try:
             _r.setex(key, ttl_sec, s)
+            if _fail_count or _fail_until: _redis_recovered()
             return
         except Exception:
-            pass
-    _mem[key] = (time.time() + ttl_sec, s)
+            _redis_failed()
+    _mem_put(key, exp, s)
+
+def pipeline_setex(items: dict[str, Any], ttl_sec: int) -> None:
+    """setex for many keys; one round trip on Redis (non-transactional pipeline)."""
+    if not items:
+        return
+    _count("sets", len(items))
+    encoded = [(_KEY_PREFIX + k, _encode(v)) for k, v in items.items()]
+    packed = [(k, _frame(raw)) for k, raw in encoded]
+    exp = time.monotonic() + ttl_sec
+    for k, raw in encoded:
+        _l1_put(k, exp, raw)
+    if _redis_ok():
+        try:
+            with _r.pipeline(transaction=False) as p:
+                for k, s in packed:
+                    p.setex(k, ttl_sec, s)
+                p.execute()
+            if _fail_count or _fail_until: _redis_recovered()
+            return
+        except Exception:
+            _redis_failed()
+    for k, s in packed:
+        _mem_put(k, exp, s)
 
-def get(key: str) -> Optional[Any]:
-    global _hits, _miss
-    if _USE_REDIS and _r:
+def mget(keys: list[str]) -> list[Optional[Any]]:
+    """get for many keys (one MGET on Redis); None for each miss."""
+    if not keys:
+        return []
+    if _redis_ok():
         try:
-            s = _r.get(key)
+            vals = _r.mget([_KEY_PREFIX + k for k in keys])
+            if _fail_count or _fail_until: _redis_recovered()
+            out: list[Optional[Any]] = [None if s is None else _unpack(s) for s in vals]
+            misses = vals.count(None)
+            _count("hits", len(vals) - misses)
+            _count("miss", misses)
+            return out
+        except Exception:
+            _redis_failed()
+    return [get(k) for k in keys]
+
+def get(key: str, *, _decode=_decode, _now=time.monotonic) -> Optional[Any]:
+    key = _KEY_PREFIX + key
+    raw = _l1_get(key)
+    if raw is not _MISSING:
+        _count("hits")
+        return _decode(raw)
+    if _redis_ok():
+        try:
+            with _r.pipeline(transaction=False) as p:
+                s, pttl = p.get(key).pttl(key).execute()
+            if _fail_count or _fail_until: _redis_recovered()
             if s is not None:
-                _hits += 1
-                return json.loads(s)
+                _count("hits")
+                raw = _unframe(s)
+                v = _decode(raw)
+                if pttl and pttl > 0:
+                    _l1_put(key, _now() + pttl / 1000.0, raw)
+                return v
             else:
-                _miss += 1
+                _count("miss")
                 return None
         except Exception:
-            pass
+            _redis_failed()
     tup = _mem.get(key)
     if not tup:
-        _miss += 1
+        _count("miss")
         return None
     exp, s = tup
-    if time.time() > exp:
+    if _now() > exp:
         _mem.pop(key, None)
-        _miss += 1
+        _count("miss")
         return None
     try:
-        _hits += 1
-        return json.loads(s)
+        raw = _unframe(s)
+        v = _decode(raw)
+        _l1_put(key, exp, raw)
+        _count("hits")
+        return v
     except Exception:
-        _miss += 1
+        _count("miss")
         return None
+
+CACHE_TTL_MAXSIZE = int(os.getenv("CACHE_TTL_MAXSIZE", "256"))
+
+def cache_ttl(seconds: int = 60, key: Optional[Callable[..., Any]] = None, maxsize: int = CACHE_TTL_MAXSIZE):
+    """
+    In-process memo of fn's return value for `seconds` (per worker, no Redis).
+    Keyed on key(*args, **kwargs) if given, else on the call's arguments.
+    At most `maxsize` entries (LRU); expired ones are dropped on write.
+    Cached values are shared between callers, so don't mutate them.
+    fn runs outside the lock: concurrent misses on one key may each compute
+    (last write wins), which is fine for the idempotent reads this wraps.
+    """
+    def deco(fn):
+        store: "OrderedDict[Any, tuple[float, Any]]" = OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with lock:
+                hit = store.get(k)
+                if hit and hit[0] > now:
+                    store.move_to_end(k)
+                    return hit[1]
+            val = fn(*args, **kwargs)
+            with lock:
+                store[k] = (now + seconds, val)
+                store.move_to_end(k)
+                # LRU order tracks reads, so expired entries can sit anywhere
+                if len(store) > maxsize:
+                    for sk in [sk for sk, (exp, _) in store.items() if exp <= now]:
+                        del store[sk]
+                    while len(store) > maxsize:
+                        store.popitem(last=False)
+            return val
+
+        def cache_clear():
+            with lock:
+                store.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return deco
@@ -1,49 +1,165 @@
 import requests
-from datetime import datetime
+from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor, Future
+import asyncio
+import bisect
+import functools
+import threading
+import numpy as np
 import logging
 import json
 import os
+from http_session import pooled_session, run_async, async_client
+try:
+    import httpx
+    try:
+        import h2  # noqa: F401  (httpx needs it for HTTP/2)
+        _HTTP2 = True
+    except Exception:
+        _HTTP2 = False
+except Exception:
+    httpx = None
+try:
+    from cache_ttl import get as cache_get, setex as cache_setex
+except Exception:
+    cache_get = lambda _k: None  # type: ignore
+    cache_setex = lambda *_a, **_k: None  # type: ignore
 
 logger = logging.getLogger(__name__)
 
+# Typed decode of Stats API /stats responses: msgspec validates the shape and
+# builds the splits in one C pass (malformed bodies raise into the callers'
+# except arms). Without msgspec the same attribute shape is built from json.
+_SPLIT_FIELDS = ("stat", "split", "team", "opponent", "pitcher")
+try:
+    import msgspec
+
+    class GameSplit(msgspec.Struct):
+        stat: dict = {}
+        split: dict = {}
+        team: dict = {}
+        opponent: dict = {}
+        pitcher: dict = {}
+
+    class StatGroup(msgspec.Struct):
+        splits: list[GameSplit] = []
+
+    class StatsResp(msgspec.Struct):
+        stats: list[StatGroup] = []
+
+    _stats_decoder = msgspec.json.Decoder(StatsResp)
+
+    def _decode_stats(raw):
+        """list of stat groups (each with .splits) from a /stats response body."""
+        return _stats_decoder.decode(raw).stats
+except Exception:
+    from types import SimpleNamespace
+
+    def _decode_stats(raw):
+        """list of stat groups (each with .splits) from a /stats response body."""
+        return [SimpleNamespace(splits=[SimpleNamespace(**{k: sp.get(k) or {} for k in _SPLIT_FIELDS})
+                                        for sp in grp.get("splits") or []])
+                for grp in json.loads(raw).get("stats") or []]
+
+def _first_splits(raw):
+    stats = _decode_stats(raw)
+    return stats[0].splits if stats else []
+
+# Shared keep-alive pool for MLB Stats API calls
+_SESSION = pooled_session(retries=2, status_forcelist=[429, 500, 502, 503, 504],
+                          pool_connections=32, pool_maxsize=64)
+BATCH_WORKERS = int(os.getenv("MLB_CTX_WORKERS", "16"))
+
+_ASYNC_CLIENT_KW = dict(http2=_HTTP2, timeout=10) if httpx is not None else {}
+
+def _async_client():
+    # throwaway client for async callers on their own event loop
+    return httpx.AsyncClient(limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                             **_ASYNC_CLIENT_KW)
+
+def _shared_async_client():
+    # long-lived client on http_session's shared loop (get_contextual_hit_rate_batch)
+    return async_client("mlb-stats", limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                        **_ASYNC_CLIENT_KW)
+
+# Single-flight: concurrent callers asking for the same key share one fetch
+# instead of each hitting the Stats API before the cache is populated
+_INFLIGHT_WAIT = float(os.getenv("MLB_INFLIGHT_WAIT", "30"))
+_inflight: dict = {}
+_inflight_lock = threading.Lock()
+
+def _single_flight(key_fn):
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = key_fn(*args, **kwargs)
+            with _inflight_lock:
+                fut = _inflight.get(key)
+                leader = fut is None
+                if leader:
+                    fut = _inflight[key] = Future()
+            if not leader:
+                return fut.result(timeout=_INFLIGHT_WAIT)
+            try:
+                res = fn(*args, **kwargs)
+                fut.set_result(res)
+                return res
+            except BaseException as e:
+                fut.set_exception(e)
+                raise
+            finally:
+                with _inflight_lock:
+                    _inflight.pop(key, None)
+        return wrapper
+    return deco
+
+# Async counterpart: one task per key within the running event loop
+_ainflight: dict = {}
+
+async def _async_single_flight(key, make_coro):
+    key = (id(asyncio.get_running_loop()), key)
+    task = _ainflight.get(key)
+    if task is None:
+        task = _ainflight[key] = asyncio.ensure_future(make_coro())
+        task.add_done_callback(lambda _t: _ainflight.pop(key, None))
+    return await asyncio.shield(task)
+
 # Enhanced Enrichment: Pitcher Split Matchups
+# batter hand -> (split code, split description) as the Stats API labels them
+_HAND_SPLIT = {"L": ("vl", "vs Left"), "R": ("vr", "vs Right")}
+# (era above, whip above, multiplier) for a struggling pitcher, then
+# (era below, whip below, multiplier) for a dominant one
+_SPLIT_EASY = (5.0, 1.4, 1.08)   # 8% boost vs struggling pitcher
+_SPLIT_HARD = (3.0, 1.1, 0.92)   # 8% reduction vs dominant pitcher
+
 def get_pitcher_splits_multiplier(pitcher_id, batter_handedness):
     """Get pitcher's performance vs specific handedness (L/R)"""
+    want = _HAND_SPLIT.get(batter_handedness)
+    if want is None:
+        return 1.0
     try:
-        response = requests.get(
-            f"{MLB_STATS_API}/people/{pitcher_id}/stats",
-            params={
-                "stats": "vsHand",
-                "season": "2025",
-                "group": "pitching"
-            },
-            timeout=10
+        response = _SESSION.get(
+            _STATS_URL.format(pitcher_id), params=_SPLITS_PARAMS, timeout=10
         )
         
         if response.status_code != 200:
             return 1.0
             
-        data = response.json()
-        splits = data.get("stats", [])
-        
-        for split in splits:
-            split_data = split.get("splits", [])
-            for hand_split in split_data:
-                split_name = hand_split.get("split", {}).get("description", "")
-                
-                # Match handedness
-                if (batter_handedness == "L" and "Left" in split_name) or \
-                   (batter_handedness == "R" and "Right" in split_name):
-                    
-                    stats = hand_split.get("stat", {})
-                    era = stats.get("era", 4.5)
-                    whip = stats.get("whip", 1.3)
-                    
-                    # Higher ERA/WHIP = easier for batters
-                    if era > 5.0 or whip > 1.4:
-                        return 1.08  # 8% boost vs struggling pitcher
-                    elif era < 3.0 and whip < 1.1:
-                        return 0.92  # 8% reduction vs dominant pitcher
+        for split in _decode_stats(response.content):
+            for hand_split in split.splits:
+                s = hand_split.split
+                if s.get("code") not in want and s.get("description") not in want:
+                    continue
+
+                stats = hand_split.stat
+                era = float(stats.get("era", 4.5))
+                whip = float(stats.get("whip", 1.3))
+
+                # Higher ERA/WHIP = easier for batters
+                if era > _SPLIT_EASY[0] or whip > _SPLIT_EASY[1]:
+                    return _SPLIT_EASY[2]
+                if era < _SPLIT_HARD[0] and whip < _SPLIT_HARD[1]:
+                    return _SPLIT_HARD[2]
                     
         return 1.0
         
@@ -52,6 +168,23 @@ def get_pitcher_splits_multiplier(pitcher_id, batter_handedness):
         return 1.0
 
 MLB_STATS_API = "https://statsapi.mlb.com/api/v1"
+MLB_SEASON = "2025"
+
+# Fixed URL templates / query params (never mutated; requests/httpx copy them)
+_STATS_PATH = "/people/{}/stats"
+_STATS_URL = MLB_STATS_API + _STATS_PATH
+_SEARCH_PATH = "/people/search"
+_SEARCH_URL = MLB_STATS_API + _SEARCH_PATH
+_SPLITS_PARAMS = {"stats": "vsHand", "season": MLB_SEASON, "group": "pitching"}
+# `fields` trims gameLog responses server-side to the keys read here: the
+# context ids/hand plus every stat the hit-rate paths count
+_GAMELOG_FIELDS = ",".join((
+    "stats", "splits", "team", "opponent", "id", "pitcher", "hand", "code", "stat",
+    "hits", "doubles", "triples", "homeRuns", "totalBases", "rbi", "runs",
+    "stolenBases", "baseOnBalls", "strikeOuts", "earnedRuns", "outs",
+))
+_GAMELOG_PARAMS = {g: {"stats": "gameLog", "season": MLB_SEASON, "group": g, "fields": _GAMELOG_FIELDS}
+                   for g in ("hitting", "pitching")}
 
 STAT_KEY_MAP = {
     "batter_total_bases": "totalBases",
@@ -72,19 +205,24 @@ STAT_KEY_MAP = {
     "pitcher_fantasy_score": "fantasyPoints"
 }
 
+@_single_flight(lambda player_name: ("pid", (player_name or "").lower()))
 def get_player_id(player_name):
     """Get MLB player ID from name"""
+    key = f"mlb:pid:{(player_name or '').lower()}"
+    hit = cache_get(key)
+    if hit:
+        return hit
     try:
-        resp = requests.get(
-            f"{MLB_STATS_API}/people/search", 
-            params={"names": player_name},
-            timeout=10
+        resp = _SESSION.get(
+            _SEARCH_URL, params={"names": player_name}, timeout=10
         )
         resp.raise_for_status()
         data = resp.json()
         
         if data.get("people"):
-            return data["people"][0]["id"]
+            pid = data["people"][0]["id"]
+            cache_setex(key, 86400, pid)
+            return pid
         return None
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching player ID for {player_name}: {e}")
@@ -93,35 +231,37 @@ def get_player_id(player_name):
         logger.error(f"Unexpected error getting player ID for {player_name}: {e}")
         return None
 
+def _context_from_logs(logs):
+    """(team_id, opponent_id, pitcher_hand) from the latest hitting gameLog split."""
+    if not logs:
+        return None
+    latest_game = logs[0]
+    return (
+        latest_game.team.get("id"),
+        latest_game.opponent.get("id"),
+        latest_game.pitcher.get("hand", {}).get("code")
+    )
+
+@_single_flight(lambda player_id: ("ctx", player_id))
 def get_opponent_context(player_id):
     """Get opponent context for a player"""
+    key = f"mlb:ctx:{player_id}:{date.today()}"
+    hit = cache_get(key)
+    if hit:
+        return tuple(hit)
     try:
-        stats_resp = requests.get(
-            f"{MLB_STATS_API}/people/{player_id}/stats",
-            params={
-                "stats": "gameLog",
-                "season": "2025",
-                "group": "hitting"
-            },
-            timeout=10
+        stats_resp = _SESSION.get(
+            _STATS_URL.format(player_id), params=_GAMELOG_PARAMS["hitting"], timeout=10
         )
         stats_resp.raise_for_status()
-        data = stats_resp.json()
-        
-        stats = data.get("stats", [])
+        stats = _decode_stats(stats_resp.content)
         if not stats:
             return None
         
-        logs = stats[0].get("splits", [])
-        if not logs:
-            return None
-        
-        latest_game = logs[0]
-        return (
-            latest_game.get("team", {}).get("id"),
-            latest_game.get("opponent", {}).get("id"),
-            latest_game.get("pitcher", {}).get("hand", {}).get("code")
-        )
+        ctx = _context_from_logs(stats[0].splits)
+        if ctx:
+            cache_setex(key, 3600, ctx)
+        return ctx
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching opponent context for player {player_id}: {e}")
         return None
@@ -129,40 +269,39 @@ def get_opponent_context(player_id):
         logger.error(f"Unexpected error getting opponent context for player {player_id}: {e}")
         return None
 
+_FALLBACK_RATES = {
+    # Batting stats - based on MLB averages
+    "hits": 0.35,
+    "totalBases": 0.40,
+    "rbi": 0.25,
+    "runs": 0.30,
+    "homeRuns": 0.15,
+    "stolenBases": 0.08,
+    "baseOnBalls": 0.20,
+    "strikeOuts": 0.65,
+    "combinedStats": 0.50,
+    "fantasyPoints": 0.45,
+    
+    # Pitching stats - based on MLB averages  
+    "pitcher_strikeouts": 0.55,
+    "pitcher_hits_allowed": 0.45,
+    "pitcher_earned_runs": 0.35,
+    "pitcher_walks": 0.20,
+    "pitcher_outs": 0.75
+}
+
+# Threshold difficulty: >=1.5 -> x0.90, >=3 -> x0.80, >=5 -> x0.65
+_THR_EDGES = (1.5, 3, 5)
+_THR_MULT = (1.0, 0.90, 0.80, 0.65)
+
 def get_fallback_hit_rate(player_name, stat_type, threshold):
     """Generate realistic fallback hit rate based on MLB averages"""
-    fallback_rates = {
-        # Batting stats - based on MLB averages
-        "hits": 0.35,
-        "totalBases": 0.40,
-        "rbi": 0.25,
-        "runs": 0.30,
-        "homeRuns": 0.15,
-        "stolenBases": 0.08,
-        "baseOnBalls": 0.20,
-        "strikeOuts": 0.65,
-        "combinedStats": 0.50,
-        "fantasyPoints": 0.45,
-        
-        # Pitching stats - based on MLB averages  
-        "pitcher_strikeouts": 0.55,
-        "pitcher_hits_allowed": 0.45,
-        "pitcher_earned_runs": 0.35,
-        "pitcher_walks": 0.20,
-        "pitcher_outs": 0.75
-    }
-    
     # Use the MLB stat key for lookup
     mlb_stat_key = STAT_KEY_MAP.get(stat_type, stat_type)
-    base_rate = fallback_rates.get(mlb_stat_key, 0.35)
+    base_rate = _FALLBACK_RATES.get(mlb_stat_key, 0.35)
     
-    # Adjust for threshold difficulty
-    if threshold >= 5:
-        base_rate *= 0.65
-    elif threshold >= 3:
-        base_rate *= 0.80
-    elif threshold >= 1.5:
-        base_rate *= 0.90
+    # Adjust for threshold difficulty (bisect_right: an edge value itself gets that edge's multiplier)
+    base_rate *= _THR_MULT[bisect.bisect_right(_THR_EDGES, threshold)]
     
     return {
         "player": player_name,
@@ -174,6 +313,55 @@ def get_fallback_hit_rate(player_name, stat_type, threshold):
         "note": "Fallback calculation based on MLB averages"
     }
 
+# gameLog stat fields read for the derived stat keys
+_STAT_COLS = {
+    "combinedStats": ("hits", "runs", "rbi"),
+    "fantasyPoints": ("hits", "doubles", "triples", "homeRuns", "rbi", "runs", "stolenBases"),
+}
+
+def _hit_rate_result(player_name, mlb_stat_key, threshold, logs, context):
+    """Hit-rate dict over the last 10 gameLog splits; None if there are fewer than 2."""
+    team_id, opponent_id, pitcher_hand = context
+
+    # Get recent games (last 10 games regardless of opponent for better sample size)
+    recent = logs[:10] if logs else []
+
+    if len(recent) < 2:
+        return None
+
+    # Count games where player exceeded threshold: one (games x keys) matrix,
+    # each row filled by map(stat.get, keys, zeros) instead of a .get per cell
+    keys = _STAT_COLS.get(mlb_stat_key) or (mlb_stat_key,)
+    zeros = (0,) * len(keys)
+    m = np.array([tuple(map(g.stat.get, keys, zeros)) for g in recent],
+                 dtype=np.float64)
+    if mlb_stat_key == "combinedStats":
+        # H+R+RBI calculation
+        vals = m.sum(axis=1)
+    elif mlb_stat_key == "fantasyPoints":
+        # Basic fantasy scoring
+        hits, doubles, triples, hrs, rbi, runs, sb = m.T
+        singles = np.maximum(0, hits - doubles - triples - hrs)
+        vals = singles + doubles * 2 + triples * 3 + hrs * 4 + rbi + runs + sb * 2
+    else:
+        vals = m[:, 0]
+    over_count = int((vals >= threshold).sum())
+    
+    hit_rate = round(over_count / len(recent), 2) if recent else 0.0
+    confidence = "High" if hit_rate >= 0.6 else "Medium" if hit_rate >= 0.4 else "Low"
+
+    return {
+        "player": player_name,
+        "stat": mlb_stat_key,
+        "threshold": threshold,
+        "hit_rate": hit_rate,
+        "sample_size": len(recent),
+        "confidence": confidence,
+        "pitcher_hand": pitcher_hand,
+        "opponent_id": opponent_id
+    }
+
+@_single_flight(lambda player_name, stat_type, threshold=1: ("hr", player_name, stat_type, threshold))
 def get_contextual_hit_rate(player_name, stat_type, threshold=1):
     """Get contextual hit rate for a player with comprehensive fallback support"""
     try:
@@ -186,80 +374,146 @@ def get_contextual_hit_rate(player_name, stat_type, threshold=1):
         if not player_id:
             return get_fallback_hit_rate(player_name, stat_type, threshold)
 
+        hr_key = f"mlb:hr:{player_id}:{mlb_stat_key}:{threshold}:{date.today()}"
+        hit = cache_get(hr_key)
+        if hit:
+            return hit
+
         context = get_opponent_context(player_id)
         if not context:
             return get_fallback_hit_rate(player_name, stat_type, threshold)
 
-        team_id, opponent_id, pitcher_hand = context
-
         # Determine group type based on stat type
         group_type = "pitching" if stat_type.startswith("pitcher_") else "hitting"
         
         # Get game logs
-        logs_resp = requests.get(
-            f"{MLB_STATS_API}/people/{player_id}/stats",
-            params={
-                "stats": "gameLog",
-                "season": "2025",
-                "group": group_type
-            },
-            timeout=10
+        logs_resp = _SESSION.get(
+            _STATS_URL.format(player_id), params=_GAMELOG_PARAMS[group_type], timeout=10
         )
         logs_resp.raise_for_status()
-        logs_data = logs_resp.json()
-        
-        logs = logs_data.get("stats", [{}])[0].get("splits", [])
-        
-        # Get recent games (last 10 games regardless of opponent for better sample size)
-        recent = logs[:10] if logs else []
-
-        if len(recent) < 2:
+        logs = _first_splits(logs_resp.content)
+        result = _hit_rate_result(player_name, mlb_stat_key, threshold, logs, context)
+        if result is None:
             return get_fallback_hit_rate(player_name, stat_type, threshold)
-
-        # Count games where player exceeded threshold
-        over_count = 0
-        for game in recent:
-            game_stat = game.get("stat", {})
-            
-            # Handle special composite stats
-            if mlb_stat_key == "combinedStats":
-                # H+R+RBI calculation
-                stat_value = (game_stat.get("hits", 0) + 
-                            game_stat.get("runs", 0) + 
-                            game_stat.get("rbi", 0))
-            elif mlb_stat_key == "fantasyPoints":
-                # Basic fantasy scoring
-                hits = game_stat.get("hits", 0)
-                doubles = game_stat.get("doubles", 0)
-                triples = game_stat.get("triples", 0)
-                hrs = game_stat.get("homeRuns", 0)
-                singles = max(0, hits - doubles - triples - hrs)
-                
-                stat_value = (singles * 1 + doubles * 2 + triples * 3 + hrs * 4 + 
-                            game_stat.get("rbi", 0) + game_stat.get("runs", 0) + 
-                            game_stat.get("stolenBases", 0) * 2)
-            else:
-                stat_value = game_stat.get(mlb_stat_key, 0)
-            
-            if stat_value >= threshold:
-                over_count += 1
-        
-        hit_rate = round(over_count / len(recent), 2) if recent else 0.0
-        confidence = "High" if hit_rate >= 0.6 else "Medium" if hit_rate >= 0.4 else "Low"
-
-        return {
-            "player": player_name,
-            "stat": mlb_stat_key,
-            "threshold": threshold,
-            "hit_rate": hit_rate,
-            "sample_size": len(recent),
-            "confidence": confidence,
-            "pitcher_hand": pitcher_hand,
-            "opponent_id": opponent_id
-        }
+        cache_setex(hr_key, 600, result)
+        return result
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching contextual hit rate for {player_name}: {e}")
         return get_fallback_hit_rate(player_name, stat_type, threshold)
     except Exception as e:
         logger.error(f"Unexpected error in contextual hit rate for {player_name}: {e}")
-        return get_fallback_hit_rate(player_name, stat_type, threshold)
\ No newline at end of file
+        return get_fallback_hit_rate(player_name, stat_type, threshold)
+
+# -----------------------------------------------------------------------------
+# Async fan-out (httpx): many players' lookup chains in flight at once
+# -----------------------------------------------------------------------------
+async def _aget(client, path, params=None):
+    r = await client.get(f"{MLB_STATS_API}{path}", params=params)
+    r.raise_for_status()
+    return r
+
+async def _aget_json(client, path, params=None):
+    return (await _aget(client, path, params)).json()
+
+async def _aget_game_log(client, player_id, group):
+    async def fetch():
+        r = await _aget(client, _STATS_PATH.format(player_id), _GAMELOG_PARAMS[group])
+        return _first_splits(r.content)
+    return await _async_single_flight(("log", player_id, group), fetch)
+
+async def _aget_player_id(client, player_name):
+    key = f"mlb:pid:{(player_name or '').lower()}"
+    hit = cache_get(key)
+    if hit:
+        return hit
+    async def fetch():
+        data = await _aget_json(client, _SEARCH_PATH, {"names": player_name})
+        if data.get("people"):
+            pid = data["people"][0]["id"]
+            cache_setex(key, 86400, pid)
+            return pid
+        return None
+    return await _async_single_flight(key, fetch)
+
+async def get_contextual_hit_rate_async(player_name, stat_type, threshold=1, client=None):
+    """Async get_contextual_hit_rate; the context and stat gameLogs are fetched concurrently."""
+    if client is None:
+        async with _async_client() as client:
+            return await get_contextual_hit_rate_async(player_name, stat_type, threshold, client=client)
+    try:
+        mlb_stat_key = STAT_KEY_MAP.get(stat_type)
+        if not mlb_stat_key:
+            return get_fallback_hit_rate(player_name, stat_type, threshold)
+
+        player_id = await _aget_player_id(client, player_name)
+        if not player_id:
+            return get_fallback_hit_rate(player_name, stat_type, threshold)
+
+        hr_key = f"mlb:hr:{player_id}:{mlb_stat_key}:{threshold}:{date.today()}"
+        hit = cache_get(hr_key)
+        if hit:
+            return hit
+
+        group_type = "pitching" if stat_type.startswith("pitcher_") else "hitting"
+        ctx_key = f"mlb:ctx:{player_id}:{date.today()}"
+        context = cache_get(ctx_key)
+        if context:
+            context = tuple(context)
+            logs = await _aget_game_log(client, player_id, group_type)
+        else:
+            if group_type == "hitting":
+                # the context comes from the same hitting gameLog
+                logs = await _aget_game_log(client, player_id, "hitting")
+                context = _context_from_logs(logs)
+            else:
+                hitting, logs = await asyncio.gather(
+                    _aget_game_log(client, player_id, "hitting"),
+                    _aget_game_log(client, player_id, group_type),
+                )
+                context = _context_from_logs(hitting)
+            if context:
+                cache_setex(ctx_key, 3600, context)
+        if not context:
+            return get_fallback_hit_rate(player_name, stat_type, threshold)
+
+        result = _hit_rate_result(player_name, mlb_stat_key, threshold, logs, context)
+        if result is None:
+            return get_fallback_hit_rate(player_name, stat_type, threshold)
+        cache_setex(hr_key, 600, result)
+        return result
+    except Exception as e:
+        logger.error(f"Error in async contextual hit rate for {player_name}: {e}")
+        return get_fallback_hit_rate(player_name, stat_type, threshold)
+
+async def get_contextual_hit_rate_batch_async(items, limit=None, client=None):
+    """get_contextual_hit_rate_async over (player_name, stat_type, threshold) tuples, at most `limit` in flight."""
+    if client is None:
+        async with _async_client() as client:
+            return await get_contextual_hit_rate_batch_async(items, limit, client=client)
+    sem = asyncio.Semaphore(limit or BATCH_WORKERS)
+    async def one(it):
+        async with sem:
+            return await get_contextual_hit_rate_async(*it, client=client)
+    return await asyncio.gather(*(one(it) for it in items))
+
+async def _batch_on_shared_loop(items):
+    return await get_contextual_hit_rate_batch_async(items, client=_shared_async_client())
+
+def get_contextual_hit_rate_batch(items):
+    """
+    get_contextual_hit_rate over many (player_name, stat_type, threshold) tuples,
+    results in input order. Uses the httpx async fan-out when available (and no
+    event loop is already running in this thread), on http_session's shared
+    loop and one long-lived client; otherwise overlaps the requests-based
+    chains on a thread pool.
+    """
+    items = list(items)
+    if not items:
+        return []
+    if httpx is not None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return run_async(_batch_on_shared_loop(items))
+    with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(items))) as ex:
+        return list(ex.map(lambda it: get_contextual_hit_rate(*it), items))
@@ -4,64 +4,208 @@ import logging
 import json
 import time
 import os
+import asyncio
+import sqlite3
+import threading
+import functools
+from types import MappingProxyType
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from http_session import pooled_session, run_async, async_client
+try:
+    from cache_ttl import get as cache_get, setex as cache_setex
+except Exception:
+    cache_get = lambda _k: None  # type: ignore
+    cache_setex = lambda *_a, **_k: None  # type: ignore
+try:
+    import httpx
+except Exception:
+    httpx = None
+try:
+    from cachetools import TTLCache
+except Exception:
+    TTLCache = None
 
 logger = logging.getLogger(__name__)
 
+# orjson for MLB payloads and the JSON cache files; stdlib json if it's missing
+try:
+    import orjson
+    _loads = orjson.loads  # takes str or bytes
+    def _dumps(v): return orjson.dumps(v, option=orjson.OPT_NON_STR_KEYS)
+except Exception:
+    _loads = json.loads
+    def _dumps(v): return json.dumps(v).encode("utf-8")
+
+# On-disk JSON caches are stored zstd-compressed as <name>.zst; a plain
+# <name> left by older builds is still read until it is rewritten
+try:
+    import zstandard
+    _zc = zstandard.ZstdCompressor(level=3)
+    _zd = zstandard.ZstdDecompressor()
+except Exception:
+    zstandard = None
+
+def _write_json_cache(path, obj):
+    if zstandard is None:
+        with open(path, "wb") as f:
+            f.write(_dumps(obj))
+        return path
+    tmp = path + ".zst.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_zc.compress(_dumps(obj)))
+    os.replace(tmp, path + ".zst")
+    return path + ".zst"
+
+def _read_json_cache(path):
+    """Parsed cache file: path.zst if present, else the plain path (FileNotFoundError if neither)."""
+    if zstandard is not None:
+        try:
+            with open(path + ".zst", "rb") as f:
+                return _loads(_zd.decompress(f.read()))
+        except FileNotFoundError:
+            pass
+    with open(path, "rb") as f:
+        return _loads(f.read())
+
+# Shared keep-alive pool for MLB Stats API calls
+_SESSION = pooled_session(retries=2, status_forcelist=[429, 500, 502, 503, 504],
+                          pool_connections=50, pool_maxsize=50)
+ROSTER_CONCURRENCY = int(os.getenv("MLB_ROSTER_CONCURRENCY", "32"))
+MLB_SEASON = "2025"
+GAME_LOG_TTL = 600
+# Server-side trim of gameLog responses to the keys this module reads (the
+# Stats API `fields` filter keeps any key named here, at any depth). One field
+# set for every caller so each player's log is still fetched/cached once.
+_GAME_LOG_STAT_FIELDS = (
+    "hits", "doubles", "triples", "homeRuns", "totalBases", "rbi", "runs",
+    "stolenBases", "baseOnBalls", "hitByPitch", "strikeOuts", "earnedRuns",
+    "outs", "gamesPlayed",
+)
+GAME_LOG_FIELDS = ",".join(("stats", "splits", "date", "team", "opponent", "id",
+                            "pitcher", "hand", "code", "stat") + _GAME_LOG_STAT_FIELDS)
+
+def get_game_log(player_id, group="hitting", season=MLB_SEASON):
+    """
+    gameLog splits for a player (newest first). One fetch per
+    (player, group, season) every GAME_LOG_TTL seconds, shared by the form,
+    opponent-context, hit-rate and fantasy lookups (and across workers via
+    cache_ttl's Redis). Raises on HTTP errors.
+    """
+    key = f"mlb:log:{player_id}:{group}:{season}"
+    hit = cache_get(key)
+    if hit is not None:
+        return hit
+    resp = _SESSION.get(
+        f"{MLB_STATS_API}/people/{player_id}/stats",
+        params={"stats": "gameLog", "season": season, "group": group, "fields": GAME_LOG_FIELDS},
+        timeout=10
+    )
+    resp.raise_for_status()
+    stats = _loads(resp.content).get("stats") or [{}]
+    logs = stats[0].get("splits", [])
+    cache_setex(key, GAME_LOG_TTL, logs)
+    return logs
+
 # Enhanced Enrichment: Park Factor Analysis
+PARK_FACTORS_FILE = "park_factors.json"
+# Parsed file, reloaded only when its mtime changes
+_PARK_FACTORS = {"data": None, "mtime": None}
+
 def load_park_factors():
     """Load park factors from JSON file with safe fallback"""
     try:
-        with open("park_factors.json", "r") as f:
-            return json.load(f)
+        mtime = os.stat(PARK_FACTORS_FILE).st_mtime_ns
+        if _PARK_FACTORS["mtime"] == mtime:
+            return _PARK_FACTORS["data"]
+        with open(PARK_FACTORS_FILE, "rb") as f:
+            data = _loads(f.read())
+        _PARK_FACTORS["data"], _PARK_FACTORS["mtime"] = data, mtime
+        return data
     except Exception as e:
-        logger.warning(f"Failed to load park factors: {e}")
+        if _PARK_FACTORS["mtime"] != "missing":
+            logger.warning(f"Failed to load park factors: {e}")
+            _PARK_FACTORS["data"], _PARK_FACTORS["mtime"] = {}, "missing"
         return {}
 
+# stat_type substring -> park factor key, checked in order
+_PARK_STAT_KEYS = (
+    ("home_runs", "hr_factor"), ("hr", "hr_factor"),
+    ("total_bases", "tb_factor"), ("tb", "tb_factor"),
+    ("hits", "hits_factor"),
+    ("runs", "run_factor"),
+)
+
+def _scan_park_factor_key(stat_type):
+    return next((k for sub, k in _PARK_STAT_KEYS if sub in stat_type), None)
+
+# Every stat_type the feeds emit, resolved once at import (None = no factor);
+# anything else is scanned on first sight and added
+_PARK_FACTOR_KEY = {st: _scan_park_factor_key(st) for st in (
+    "batter_hits", "batter_rbi", "batter_runs_batted_in", "batter_runs",
+    "batter_home_runs", "batter_total_bases", "batter_stolen_bases",
+    "batter_walks", "batter_strikeouts", "batter_hits_runs_rbis",
+    "batter_fantasy_score", "pitcher_strikeouts", "pitcher_hits_allowed",
+    "pitcher_earned_runs", "pitcher_walks", "pitcher_outs", "pitcher_fantasy_score",
+    "hits", "rbi", "runs", "homeruns", "totalbases", "stolenbases",
+    "strikeouts", "baseonballs", "",
+)}
+
+def _park_factor_key(stat_type):
+    try:
+        return _PARK_FACTOR_KEY[stat_type]
+    except KeyError:
+        key = _PARK_FACTOR_KEY[stat_type] = _scan_park_factor_key(stat_type)
+        return key
+
 def apply_park_factor(prop, stadium_name):
     """Apply park factor multiplier based on stadium and stat type"""
     try:
-        park_factors = load_park_factors()
-        factors = park_factors.get(stadium_name, {})
-        
-        stat_type = prop.get("stat_type", "").lower()
-        
-        if "home_runs" in stat_type or "hr" in stat_type:
-            return factors.get("hr_factor", 1.0)
-        elif "total_bases" in stat_type or "tb" in stat_type:
-            return factors.get("tb_factor", 1.0)
-        elif "hits" in stat_type:
-            return factors.get("hits_factor", 1.0)
-        elif "runs" in stat_type:
-            return factors.get("run_factor", 1.0)
+        factors = load_park_factors().get(stadium_name)
+        if not factors:
+            return 1.0
         
-        return 1.0
+        key = _park_factor_key(prop.get("stat_type", "").lower())
+        return factors.get(key, 1.0) if key else 1.0
     except Exception as e:
         logger.debug(f"Park factor error for {stadium_name}: {e}")
         return 1.0
 
+_PARK_FACTOR_COLS = ("hr_factor", "tb_factor", "hits_factor", "run_factor")
+_PARK_TABLE = {"src": None, "table": None, "rows": None}
+
+def _park_factor_table(park_factors):
+    # (stadiums + 1) x (factor keys + 1) multipliers; the extra row/col (1.0)
+    # stands for "unknown stadium" / "no factor for this stat"
+    if _PARK_TABLE["src"] is not park_factors:
+        table = np.ones((len(park_factors) + 1, len(_PARK_FACTOR_COLS) + 1))
+        for i, factors in enumerate(park_factors.values()):
+            for j, key in enumerate(_PARK_FACTOR_COLS):
+                table[i, j] = (factors or {}).get(key, 1.0)
+        _PARK_TABLE.update(src=park_factors, table=table,
+                           rows={name: i for i, name in enumerate(park_factors)})
+    return _PARK_TABLE["table"], _PARK_TABLE["rows"]
+
+def apply_park_factor_batch(props, stadium_field="venue"):
+    """apply_park_factor for every prop at once (float64 array, 1.0 = no adjustment)."""
+    n = len(props)
+    park_factors = load_park_factors()
+    if not park_factors or not n:
+        return np.ones(n)
+    table, rows = _park_factor_table(park_factors)
+    cols = {key: j for j, key in enumerate(_PARK_FACTOR_COLS)}
+    no_row, no_col = len(rows), len(cols)
+    r = np.fromiter((rows.get(p.get(stadium_field) or "", no_row) for p in props),
+                    dtype=np.intp, count=n)
+    c = np.fromiter((cols.get(_park_factor_key(p.get("stat_type", "").lower()), no_col) for p in props),
+                    dtype=np.intp, count=n)
+    return table[r, c]
+
 # Enhanced Enrichment: Recent Player Form
 def get_recent_form_multiplier(player_id, stat_type):
     """Calculate recent form multiplier based on last 5 games vs season average"""
     try:
-        response = requests.get(
-            f"{MLB_STATS_API}/people/{player_id}/stats",
-            params={
-                "stats": "gameLog",
-                "season": "2025",
-                "group": "hitting" if "batter_" in stat_type else "pitching"
-            },
-            timeout=10
-        )
-        
-        if response.status_code != 200:
-            return 1.0
-            
-        data = response.json()
-        stats = data.get("stats", [])
-        if not stats:
-            return 1.0
-        
-        logs = stats[0].get("splits", [])
+        logs = get_game_log(player_id, "hitting" if "batter_" in stat_type else "pitching")
         if len(logs) < 5:
             return 1.0
         
@@ -102,13 +246,13 @@ def get_recent_form_multiplier(player_id, stat_type):
         return 1.0
 
 # Enhanced Enrichment: Bullpen Fatigue Context
+# This is a simplified version - in production you'd call MLB API for actual bullpen data
+_HIGH_USAGE_TEAMS = frozenset(("Red Sox", "Royals", "Angels", "White Sox", "Rockies"))
+
 def get_bullpen_fatigue_multiplier(team_name):
     """Analyze bullpen usage over past 3 games"""
     try:
-        # This is a simplified version - in production you'd call MLB API for actual bullpen data
-        high_usage_teams = ["Red Sox", "Royals", "Angels", "White Sox", "Rockies"]
-        
-        if team_name in high_usage_teams:
+        if team_name in _HIGH_USAGE_TEAMS:
             return 1.05  # 5% boost for hitting props against fatigued bullpens
         return 1.0
         
@@ -117,16 +261,16 @@ def get_bullpen_fatigue_multiplier(team_name):
         return 1.0
 
 # Enhanced Enrichment: Lineup Position Influence  
+# Simplified - would integrate with actual lineup data in production
+_TOP_ORDER_PLAYERS = frozenset(("Mookie Betts", "Aaron Judge", "Juan Soto", "Freddie Freeman"))
+_BOTTOM_ORDER_PLAYERS = frozenset(("Kyle Higashioka", "Nick Ahmed", "Jake Meyers"))
+
 def get_lineup_position_multiplier(player_name):
     """Apply multiplier based on typical lineup position"""
     try:
-        # Simplified - would integrate with actual lineup data in production
-        top_order_players = ["Mookie Betts", "Aaron Judge", "Juan Soto", "Freddie Freeman"]
-        bottom_order_players = ["Kyle Higashioka", "Nick Ahmed", "Jake Meyers"]
-        
-        if player_name in top_order_players:
+        if player_name in _TOP_ORDER_PLAYERS:
             return 1.08  # 8% boost for 1-4 hitters
-        elif player_name in bottom_order_players:
+        elif player_name in _BOTTOM_ORDER_PLAYERS:
             return 0.95  # 5% reduction for 7-9 hitters
         
         return 1.0
@@ -137,62 +281,190 @@ def get_lineup_position_multiplier(player_name):
 
 MLB_STATS_API = "https://statsapi.mlb.com/api/v1"
 
-def cache_props_to_file(props, filename="mlb_props_cache.json"):
-    """Redis-free prop caching using flat JSON file"""
+# Default prop cache: one SQLite row per prop, keyed by a stable per-row
+# identity (_prop_row_keys). A save writes only new/changed rows and deletes
+# the ones dropped from the board; the snapshot's age (prop_meta.saved_at)
+# decides expiry, so unchanged rows are never rewritten.
+# An explicit filename still uses the flat-JSON path.
+PROPS_CACHE_FILE = "mlb_props_cache.json"
+PROPS_CACHE_DB = os.getenv("PROPS_CACHE_DB", "mlb_props_cache.sqlite")
+PROPS_CACHE_TTL = 3600
+_props_db = None
+_props_db_lock = threading.Lock()
+
+def _props_cache_db():
+    global _props_db
+    if _props_db is None:
+        db = sqlite3.connect(PROPS_CACHE_DB, timeout=5, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("DROP TABLE IF EXISTS props")  # pre-prop_rows layout
+        db.execute("CREATE TABLE IF NOT EXISTS prop_rows (k TEXT PRIMARY KEY, v BLOB NOT NULL, pos INTEGER NOT NULL)")
+        db.execute("CREATE TABLE IF NOT EXISTS prop_meta (id INTEGER PRIMARY KEY CHECK (id = 0), saved_at REAL NOT NULL)")
+        _props_db = db
+    return _props_db
+
+def _prop_row_keys(props):
+    """
+    Stable identity per row: the prop's id, else player|stat|line|bookmaker
+    plus the occurrence number of that key in this save. MLB over/under
+    outcomes share every keyed field, so the counter keeps both.
+    """
+    seen = {}
+    keys = []
+    for p in props:
+        base = (str(p["id"]) if p.get("id") is not None else
+                f"{p.get('player')}|{p.get('stat')}|{p.get('line')}|{p.get('bookmaker')}")
+        n = seen[base] = seen.get(base, -1) + 1
+        keys.append(f"{base}#{n}")
+    return keys
+
+def cache_props_to_file(props, filename=PROPS_CACHE_FILE):
+    """Redis-free prop caching (SQLite by default, flat JSON for an explicit filename)"""
+    if filename == PROPS_CACHE_FILE:
+        try:
+            rows = {k: (_dumps(p), pos) for pos, (k, p) in enumerate(zip(_prop_row_keys(props), props))}
+            with _props_db_lock:
+                db = _props_cache_db()
+                with db:
+                    old = {k: (bytes(v), pos) for k, v, pos in db.execute("SELECT k, v, pos FROM prop_rows")}
+                    changed = [(k, v, pos) for k, (v, pos) in rows.items() if old.get(k) != (v, pos)]
+                    gone = [(k,) for k in old.keys() - rows.keys()]
+                    db.executemany("DELETE FROM prop_rows WHERE k = ?", gone)
+                    db.executemany("INSERT OR REPLACE INTO prop_rows (k, v, pos) VALUES (?, ?, ?)", changed)
+                    db.execute("INSERT OR REPLACE INTO prop_meta (id, saved_at) VALUES (0, ?)", (time.time(),))
+            logger.info(f"[CACHE] Props saved to {PROPS_CACHE_DB} "
+                        f"({len(changed)} written, {len(gone)} removed, {len(rows)} total)")
+            return True
+        except Exception as e:
+            logger.warning(f"[CACHE] SQLite prop cache unavailable, using {filename}: {e}")
     try:
-        with open(filename, "w") as f:
-            json.dump(props, f)
-        print(f"[CACHE] Props saved to {filename} ✅")
+        path = _write_json_cache(filename, props)
+        logger.info(f"[CACHE] Props saved to {path}")
         return True
     except Exception as e:
-        print(f"[CACHE ERROR] Failed to write cache: {e}")
+        logger.error(f"[CACHE] Failed to write cache: {e}")
         return False
 
-def load_props_from_file(filename="mlb_props_cache.json"):
+def load_props_from_file(filename=PROPS_CACHE_FILE):
     """Load props from file cache"""
+    if filename == PROPS_CACHE_FILE:
+        try:
+            with _props_db_lock:
+                db = _props_cache_db()
+                meta = db.execute("SELECT saved_at FROM prop_meta WHERE id = 0").fetchone()
+                fresh = meta is not None and time.time() - meta[0] < PROPS_CACHE_TTL
+                rows = db.execute("SELECT v FROM prop_rows ORDER BY pos").fetchall() if fresh else []
+            if rows:
+                props = [_loads(v) for (v,) in rows]
+                logger.info(f"[CACHE] Loaded {len(props)} props from {PROPS_CACHE_DB}")
+                return props
+        except Exception as e:
+            logger.warning(f"[CACHE] SQLite prop cache unavailable, using {filename}: {e}")
     try:
-        with open(filename, "r") as f:
-            props = json.load(f)
-        print(f"[CACHE] Loaded {len(props)} props from {filename}")
+        props = _read_json_cache(filename)
+        logger.info(f"[CACHE] Loaded {len(props)} props from {filename}")
         return props
     except FileNotFoundError:
-        print(f"[CACHE] No cache file found: {filename}")
+        logger.info(f"[CACHE] No cache file found: {filename}")
         return []
     except Exception as e:
-        print(f"[CACHE ERROR] Failed to load cache: {e}")
+        logger.error(f"[CACHE] Failed to load cache: {e}")
         return []
 
-# In-memory cache for player IDs to reduce API calls
-player_id_cache = {}
-player_context_cache = {}
+# In-memory cache for player IDs to reduce API calls (name -> id or None)
 cache_timeout = 3600  # 1 hour cache timeout
+# Both bounded (TTL + LRU eviction) so a long-lived worker can't grow them
+# without limit; a plain dict only when cachetools is missing
+player_id_cache = TTLCache(maxsize=5000, ttl=cache_timeout) if TTLCache else {}
+player_context_cache = TTLCache(maxsize=5000, ttl=600) if TTLCache else {}
+_player_id_cache_lock = threading.Lock()  # TTLCache isn't thread-safe
+_MISS = object()
+# player_id_cache hit/miss counts, logged every CACHE_STATS_EVERY lookups
+CACHE_STATS_EVERY = 1000
+_pid_stats = {"hits": 0, "misses": 0}
+
+def _count_pid_lookup(hit):
+    # caller holds _player_id_cache_lock
+    _pid_stats["hits" if hit else "misses"] += 1
+    total = _pid_stats["hits"] + _pid_stats["misses"]
+    if total % CACHE_STATS_EVERY == 0:
+        logger.info(f"[CACHE] player_id_cache hits={_pid_stats['hits']} misses={_pid_stats['misses']} "
+                    f"size={len(player_id_cache)}")
+
+# name -> MLB id for every active-roster player, built from one teams+rosters
+# walk and persisted for 24h (same pattern as player_team_cache.json)
+PLAYER_ID_INDEX_FILE = "player_id_index.json"
+_PLAYER_ID_INDEX = None
+_player_id_index_at = 0.0
+_player_id_index_lock = threading.Lock()
+
+def _index_stale():
+    # rebuild daily; retry an empty (failed) build after 5 minutes
+    ttl = 86400 if _PLAYER_ID_INDEX else 300
+    return _PLAYER_ID_INDEX is None or time.time() - _player_id_index_at > ttl
+
+def _refresh_player_id_index():
+    # caller holds _player_id_index_lock
+    global _PLAYER_ID_INDEX, _player_id_index_at
+    index = build_player_id_index()
+    _PLAYER_ID_INDEX = {name.lower(): pid for name, pid in index.items()}
+    _player_id_index_at = time.time()
+
+def prewarm_player_id_index():
+    """
+    Load or build the name index now (blocking: ~30 roster requests on a cold
+    disk cache). For cron/startup; get_player_id never waits on a build.
+    """
+    with _player_id_index_lock:
+        if _index_stale():
+            _refresh_player_id_index()
+    return _PLAYER_ID_INDEX
+
+def _refresh_player_id_index_bg():
+    # runs with _player_id_index_lock already taken by _player_id_index()
+    try:
+        _refresh_player_id_index()
+    except Exception as e:
+        logger.warning(f"Player id index refresh failed: {e}")
+    finally:
+        _player_id_index_lock.release()
+
+def _player_id_index():
+    """Current name index without blocking; a missing/stale one is rebuilt on a background thread."""
+    if _index_stale() and _player_id_index_lock.acquire(blocking=False):
+        threading.Thread(target=_refresh_player_id_index_bg, name="player-id-index", daemon=True).start()
+    return _PLAYER_ID_INDEX or {}
 
 def get_player_id(player_name):
     """Get MLB player ID from name with caching"""
+    # roster index if it's loaded; until then (or for off-roster names) one search
+    pid = _player_id_index().get((player_name or "").lower())
+    if pid:
+        return pid
+
     # Check cache first
-    cache_key = f"player_id_{player_name}"
-    cached_data = player_id_cache.get(cache_key)
-    if cached_data and (time.time() - cached_data['timestamp']) < cache_timeout:
-        return cached_data['player_id']
+    with _player_id_cache_lock:
+        cached = player_id_cache.get(player_name, _MISS)
+        _count_pid_lookup(cached is not _MISS)
+    if cached is not _MISS:
+        return cached
     
     try:
-        response = requests.get(
+        response = _SESSION.get(
             f"{MLB_STATS_API}/people/search", 
             params={"names": player_name},
             timeout=10
         )
         response.raise_for_status()
-        data = response.json()
+        data = _loads(response.content)
         
         player_id = None
         if data.get("people"):
             player_id = data["people"][0]["id"]
         
         # Cache the result
-        player_id_cache[cache_key] = {
-            'player_id': player_id,
-            'timestamp': time.time()
-        }
+        with _player_id_cache_lock:
+            player_id_cache[player_name] = player_id
         
         return player_id
     except requests.exceptions.RequestException as e:
@@ -206,28 +478,14 @@ def get_opponent_context(player_id):
     """Get current opponent context for a player"""
     try:
         today = datetime.utcnow().strftime("%Y-%m-%d")
-        schedule_resp = requests.get(
-            f"{MLB_STATS_API}/people/{player_id}/stats",
-            params={
-                "stats": "gameLog",
-                "season": "2025",
-                "group": "hitting"
-            },
-            timeout=10
+        log = get_game_log_arrays(player_id, "hitting")["by_date"].get(today)
+        if log is None:
+            return None
+        return (
+            log.get("team", {}).get("id"),
+            log.get("opponent", {}).get("id"),
+            log.get("pitcher", {}).get("hand", {}).get("code")
         )
-        schedule_resp.raise_for_status()
-        data = schedule_resp.json()
-        
-        logs = data.get("stats", [{}])[0].get("splits", [])
-        
-        for log in logs:
-            if log.get("date") == today:
-                return (
-                    log.get("team", {}).get("id"),
-                    log.get("opponent", {}).get("id"),
-                    log.get("pitcher", {}).get("hand", {}).get("code")
-                )
-        return None
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching opponent context for player {player_id}: {e}")
         return None
@@ -235,56 +493,143 @@ def get_opponent_context(player_id):
         logger.error(f"Unexpected error getting opponent context for player {player_id}: {e}")
         return None
 
+_STAT_MAPPING = MappingProxyType({
+    # Batting stats
+    "batter_hits": "hits",
+    "batter_rbi": "rbi", 
+    "batter_runs": "runs",
+    "batter_home_runs": "homeRuns",
+    "batter_total_bases": "totalBases",
+    "batter_stolen_bases": "stolenBases",
+    "batter_walks": "baseOnBalls",
+    "batter_strikeouts": "strikeOuts",
+    "batter_hits_runs_rbis": "hits_runs_rbis",  # Custom calculation
+    "batter_fantasy_score": "fantasy_score",  # Custom calculation
+    
+    # Pitching stats
+    "pitcher_strikeouts": "strikeOuts",
+    "pitcher_hits_allowed": "hits",
+    "pitcher_earned_runs": "earnedRuns",
+    "pitcher_walks": "baseOnBalls",
+    "pitcher_outs": "outs",
+    
+    # Legacy mappings
+    "hits": "hits",
+    "rbi": "rbi",
+    "runs": "runs",
+    "homeRuns": "homeRuns",
+    "totalBases": "totalBases",
+    "stolenBases": "stolenBases",
+    "strikeOuts": "strikeOuts",
+    "baseOnBalls": "baseOnBalls"
+})
+
+# Known pitcher prop types; anything else unknown falls back to the prefix test
+_PITCHING_STATS = frozenset(k for k in _STAT_MAPPING if k.startswith("pitcher_"))
+
+def _stat_group(stat_type):
+    """gameLog group ("pitching"/"hitting") for a prop stat type."""
+    if stat_type in _PITCHING_STATS:
+        return "pitching"
+    if stat_type in _STAT_MAPPING:
+        return "hitting"
+    return "pitching" if stat_type.startswith("pitcher_") else "hitting"
+
 def get_stat_mapping(stat_type):
     """Map prop bet stat types to MLB Stats API field names"""
-    mapping = {
-        # Batting stats
-        "batter_hits": "hits",
-        "batter_rbi": "rbi", 
-        "batter_runs": "runs",
-        "batter_home_runs": "homeRuns",
-        "batter_total_bases": "totalBases",
-        "batter_stolen_bases": "stolenBases",
-        "batter_walks": "baseOnBalls",
-        "batter_strikeouts": "strikeOuts",
-        "batter_hits_runs_rbis": "hits_runs_rbis",  # Custom calculation
-        "batter_fantasy_score": "fantasy_score",  # Custom calculation
-        
-        # Pitching stats
-        "pitcher_strikeouts": "strikeOuts",
-        "pitcher_hits_allowed": "hits",
-        "pitcher_earned_runs": "earnedRuns",
-        "pitcher_walks": "baseOnBalls",
-        "pitcher_outs": "outs",
-        
-        # Legacy mappings
-        "hits": "hits",
-        "rbi": "rbi",
-        "runs": "runs",
-        "homeRuns": "homeRuns",
-        "totalBases": "totalBases",
-        "stolenBases": "stolenBases",
-        "strikeOuts": "strikeOuts",
-        "baseOnBalls": "baseOnBalls"
-    }
-    return mapping.get(stat_type, stat_type)
+    return _STAT_MAPPING.get(stat_type, stat_type)
 
 def calculate_custom_stat(game_data, stat_type):
     """Calculate custom composite stats"""
+    return _make_stat_fn(stat_type)(game_data)
+
+# Game-log fields read by the composite stats, in the order used below
+_CUSTOM_STAT_FIELDS = {
+    "hits_runs_rbis": ("hits", "runs", "rbi"),
+    "fantasy_score": ("hits", "doubles", "triples", "homeRuns",
+                      "rbi", "runs", "stolenBases", "baseOnBalls"),
+}
+
+@functools.lru_cache(maxsize=None)
+def _make_stat_fn(stat_type):
+    """calculate_custom_stat specialised for one stat_type (fields read by one map() + unpack)."""
+    fields = _CUSTOM_STAT_FIELDS.get(stat_type)
+    if fields is None:
+        return lambda game_data: 0
+    zeros = (0,) * len(fields)
     if stat_type == "hits_runs_rbis":
-        return game_data.get("hits", 0) + game_data.get("runs", 0) + game_data.get("rbi", 0)
-    elif stat_type == "fantasy_score":
+        def hits_runs_rbis(game_data):
+            hits, runs, rbi = map(game_data.get, fields, zeros)
+            return hits + runs + rbi
+        return hits_runs_rbis
+
+    def fantasy_score(game_data):
         # Basic fantasy scoring: 1B=1, 2B=2, 3B=3, HR=4, RBI=1, R=1, SB=2, BB=1
-        hits = game_data.get("hits", 0)
-        doubles = game_data.get("doubles", 0)
-        triples = game_data.get("triples", 0)
-        hrs = game_data.get("homeRuns", 0)
+        hits, doubles, triples, hrs, rbi, runs, sb, bb = map(game_data.get, fields, zeros)
         singles = hits - doubles - triples - hrs
-        
-        return (singles * 1 + doubles * 2 + triples * 3 + hrs * 4 + 
-                game_data.get("rbi", 0) + game_data.get("runs", 0) + 
-                game_data.get("stolenBases", 0) * 2 + game_data.get("baseOnBalls", 0))
-    return 0
+        return singles + doubles * 2 + triples * 3 + hrs * 4 + rbi + runs + sb * 2 + bb
+    return fantasy_score
+
+def _stat_columns(game_stats, fields):
+    """(games x fields) float64 matrix from per-game stat dicts; missing fields are 0."""
+    zeros = (0,) * len(fields)
+    return np.array([tuple(map(g.get, fields, zeros)) for g in game_stats],
+                    dtype=np.float64).reshape(len(game_stats), len(fields))
+
+def _custom_stat_from_columns(col, stat_type):
+    # col(field) -> float64 column over games
+    if stat_type == "hits_runs_rbis":
+        return col("hits") + col("runs") + col("rbi")
+    hits, doubles, triples, hrs = col("hits"), col("doubles"), col("triples"), col("homeRuns")
+    singles = hits - doubles - triples - hrs
+    return (singles + doubles * 2 + triples * 3 + hrs * 4 + col("rbi") + col("runs") +
+            col("stolenBases") * 2 + col("baseOnBalls"))
+
+# Per-(player, group) column view of a gameLog, memoized for GAME_LOG_TTL
+# (the log's own cache lifetime) so repeat lookups skip get_game_log's decode
+# and the array build; (expires, arrays), cleared wholesale when full
+_GAME_LOG_ARRAYS = {}
+_GAME_LOG_ARRAYS_MAX = 4096
+_game_log_arrays_lock = threading.Lock()
+_STAT_FIELD_INDEX = {k: i for i, k in enumerate(_GAME_LOG_STAT_FIELDS)}
+
+def get_game_log_arrays(player_id, group="hitting"):
+    """
+    gameLog as arrays: {"opp": int64 opponent ids (-1 = missing),
+    "hand": pitcher hand codes ("" = missing), "stats": (games x
+    _GAME_LOG_STAT_FIELDS) float64, "by_date": {date: first split on that
+    date}}. Shared between callers for up to GAME_LOG_TTL, so treat it as
+    read-only. Raises like get_game_log.
+    """
+    key = (player_id, group)
+    now = time.monotonic()
+    with _game_log_arrays_lock:
+        hit = _GAME_LOG_ARRAYS.get(key)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    logs = get_game_log(player_id, group)
+    arrays = {
+        "opp": np.fromiter(((g.get("opponent") or {}).get("id") or -1 for g in logs),
+                           dtype=np.int64, count=len(logs)),
+        "hand": np.array([((g.get("pitcher") or {}).get("hand") or {}).get("code") or ""
+                          for g in logs], dtype=object),
+        "stats": _stat_columns([g.get("stat", {}) for g in logs], _GAME_LOG_STAT_FIELDS),
+        "by_date": {},
+    }
+    for g in logs:
+        arrays["by_date"].setdefault(g.get("date"), g)
+    with _game_log_arrays_lock:
+        if len(_GAME_LOG_ARRAYS) >= _GAME_LOG_ARRAYS_MAX:
+            _GAME_LOG_ARRAYS.clear()
+        _GAME_LOG_ARRAYS[key] = (now + GAME_LOG_TTL, arrays)
+    return arrays
+
+def _stat_values(stats, api_field):
+    """Per-game values of api_field (or a composite stat) from a get_game_log_arrays matrix."""
+    col = lambda k: stats[:, _STAT_FIELD_INDEX[k]] if k in _STAT_FIELD_INDEX else np.zeros(len(stats))
+    if api_field in _CUSTOM_STAT_FIELDS:
+        return _custom_stat_from_columns(col, api_field)
+    return col(api_field)
 
 def get_confidence_level(hit_rate, sample_size):
     """Determine confidence level based on hit rate and sample size"""
@@ -297,38 +642,38 @@ def get_confidence_level(hit_rate, sample_size):
     else:
         return "Low"
 
+# Basic fallback rates based on stat type (scaled down by threshold below)
+_FALLBACK_RATES = MappingProxyType({
+    "batter_hits": 0.35,
+    "batter_rbi": 0.25,
+    "batter_runs": 0.30,
+    "batter_home_runs": 0.15,
+    "batter_total_bases": 0.40,
+    "batter_stolen_bases": 0.10,
+    "batter_walks": 0.20,
+    "batter_strikeouts": 0.60,
+    "batter_hits_runs_rbis": 0.45,
+    "batter_fantasy_score": 0.50,
+    "pitcher_strikeouts": 0.55,
+    "pitcher_hits_allowed": 0.45,
+    "pitcher_earned_runs": 0.30,
+    "pitcher_walks": 0.25,
+    "pitcher_outs": 0.70,
+    # Legacy mappings
+    "hits": 0.35,
+    "rbi": 0.25,
+    "runs": 0.30,
+    "homeRuns": 0.15,
+    "totalBases": 0.40,
+    "stolenBases": 0.10,
+    "strikeOuts": 0.60,
+    "baseOnBalls": 0.20
+})
+
 def get_fallback_hit_rate(player_name, stat_type, threshold):
     """Generate fallback hit rate using basic heuristics"""
     try:
-        # Basic fallback rates based on stat type and threshold
-        fallback_rates = {
-            "batter_hits": 0.35,
-            "batter_rbi": 0.25,
-            "batter_runs": 0.30,
-            "batter_home_runs": 0.15,
-            "batter_total_bases": 0.40,
-            "batter_stolen_bases": 0.10,
-            "batter_walks": 0.20,
-            "batter_strikeouts": 0.60,
-            "batter_hits_runs_rbis": 0.45,
-            "batter_fantasy_score": 0.50,
-            "pitcher_strikeouts": 0.55,
-            "pitcher_hits_allowed": 0.45,
-            "pitcher_earned_runs": 0.30,
-            "pitcher_walks": 0.25,
-            "pitcher_outs": 0.70,
-            # Legacy mappings
-            "hits": 0.35,
-            "rbi": 0.25,
-            "runs": 0.30,
-            "homeRuns": 0.15,
-            "totalBases": 0.40,
-            "stolenBases": 0.10,
-            "strikeOuts": 0.60,
-            "baseOnBalls": 0.20
-        }
-        
-        base_rate = fallback_rates.get(stat_type, 0.30)
+        base_rate = _FALLBACK_RATES.get(stat_type, 0.30)
         
         # Adjust based on threshold (higher threshold = lower hit rate)
         if threshold >= 5:
@@ -373,60 +718,38 @@ def get_contextual_hit_rate(player_name, stat_type, threshold=1):
         team_id, opponent_id, pitcher_hand = context
 
         # Determine if it's a pitching or batting stat
-        is_pitching_stat = stat_type.startswith("pitcher_")
-        group = "pitching" if is_pitching_stat else "hitting"
-
-        # Get game logs
-        logs_resp = requests.get(
-            f"{MLB_STATS_API}/people/{player_id}/stats",
-            params={
-                "stats": "gameLog",
-                "season": "2025",
-                "group": group
-            },
-            timeout=10
-        )
-        logs_resp.raise_for_status()
-        logs_data = logs_resp.json()
-        
-        logs = logs_data.get("stats", [{}])[0].get("splits", [])
+        group = _stat_group(stat_type)
+
+        # Get game logs (column view, cached per player)
+        arrays = get_game_log_arrays(player_id, group)
 
         # Filter for contextual games (same opponent and pitcher handedness)
-        filtered = [
-            game for game in logs[:10]
-            if (game.get("opponent", {}).get("id") == opponent_id and
-                game.get("pitcher", {}).get("hand", {}).get("code") == pitcher_hand)
-        ]
+        # among the last 10
+        mask = ((arrays["opp"][:10] == (opponent_id if opponent_id is not None else -1)) &
+                (arrays["hand"][:10] == (pitcher_hand or "")))
+        sample_size = int(mask.sum())
 
-        if not filtered:
+        if not sample_size:
             return get_fallback_hit_rate(player_name, stat_type, threshold)
 
         # Map stat type to API field name
         api_field = get_stat_mapping(stat_type)
         
         # Count games where player exceeded threshold
-        over_count = 0
-        for game in filtered:
-            game_stat = game.get("stat", {})
-            if api_field in ["hits_runs_rbis", "fantasy_score"]:
-                stat_value = calculate_custom_stat(game_stat, api_field)
-            else:
-                stat_value = game_stat.get(api_field, 0)
-            
-            if stat_value >= threshold:
-                over_count += 1
+        values = _stat_values(arrays["stats"][:10][mask], api_field)
+        over_count = int((values >= threshold).sum())
         
-        hit_rate = round(over_count / len(filtered), 2) if filtered else 0.0
+        hit_rate = round(over_count / sample_size, 2)
 
         return {
             "player": player_name,
             "stat": stat_type,
             "threshold": threshold,
             "hit_rate": hit_rate,
-            "sample_size": len(filtered),
+            "sample_size": sample_size,
             "pitcher_hand": pitcher_hand,
             "opponent_id": opponent_id,
-            "confidence": get_confidence_level(hit_rate, len(filtered))
+            "confidence": get_confidence_level(hit_rate, sample_size)
         }
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching contextual hit rate for {player_name}: {e}")
@@ -435,50 +758,42 @@ def get_contextual_hit_rate(player_name, stat_type, threshold=1):
         logger.error(f"Unexpected error in contextual hit rate for {player_name}: {e}")
         return get_fallback_hit_rate(player_name, stat_type, threshold)
 
+def fantasy_hit_rate_stats(player_name, window=15):
+    """
+    Shared core of the fantasy hit-rate lookups (here and in fantasy.py):
+    (player_id, hit_rate, games). hit_rate is the share of the last `window`
+    logged games with a hit, None with fewer than 5 games; games is the
+    number of logged games. player_id is None if the player isn't found.
+    """
+    player_id = get_player_id(player_name)
+    if not player_id:
+        return None, None, 0
+    hits = get_game_log_arrays(player_id, "hitting")["stats"][:, _STAT_FIELD_INDEX["hits"]]
+    recent = hits[-window:]
+    if len(recent) < 5:
+        if len(hits):
+            print(f"[SKIP] Not enough games for {player_name}")
+        return player_id, None, len(hits)
+    return player_id, round(float((recent > 0).mean()), 2), len(hits)
+
 def get_fantasy_hit_rate(player_name, threshold=6):
     """Get fantasy hit rate using safe calculation method"""
     try:
-        # Import safe function from fantasy module
-        from fantasy import safe_fantasy_hit_rate, get_player_id
-        import requests
-        
-        player_id = get_player_id(player_name)
+        player_id, hit_rate, games = fantasy_hit_rate_stats(player_name)
         if not player_id:
             print(f"[SKIP] Player ID not found for {player_name}")
             return get_fallback_hit_rate(player_name, "fantasy_score", threshold)
-
-        # Get game logs safely
-        logs_resp = requests.get(
-            f"https://statsapi.mlb.com/api/v1/people/{player_id}/stats",
-            params={
-                "stats": "gameLog",
-                "season": "2025",
-                "group": "hitting"
-            },
-            timeout=10
-        )
-        logs_resp.raise_for_status()
-        logs_data = logs_resp.json()
-        
-        # Safe stats access
-        stats_array = logs_data.get("stats", [])
-        if not stats_array:
+        if not games:
             print(f"[SKIP] No stats data for {player_name}")
             return get_fallback_hit_rate(player_name, "fantasy_score", threshold)
         
-        logs = stats_array[0].get("splits", [])
-        stat_data = {player_id: [game.get("stat", {}) for game in logs]}
-        
-        # Use safe hit rate calculation
-        hit_rate = safe_fantasy_hit_rate(player_id, player_name, stat_data, "hits", 15)
-        
         if hit_rate is not None:
             return {
                 "player": player_name,
                 "stat": "fantasy_score",
                 "threshold": threshold,
                 "hit_rate": hit_rate,
-                "sample_size": len(stat_data[player_id]),
+                "sample_size": games,
                 "confidence": "Medium" if hit_rate > 0.5 else "Low"
             }
         else:
@@ -489,67 +804,169 @@ def get_fantasy_hit_rate(player_name, threshold=6):
         logger.error(f"Fantasy hit rate error for {player_name}: {e}")
         return get_fallback_hit_rate(player_name, "fantasy_score", threshold)
 
+_ROSTER_URL = MLB_STATS_API + "/teams/{}/roster?rosterType=active"
+# _fetch_rosters result for a conditional GET answered 304 Not Modified
+NOT_MODIFIED = object()
+
+def _conditional_headers(validator):
+    headers = {}
+    if validator:
+        if validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+        if validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+    return headers
+
+def _roster_result(status, content, headers):
+    if status == 304:
+        return NOT_MODIFIED
+    data = _loads(content)
+    data["etag"] = headers.get("ETag")
+    data["last_modified"] = headers.get("Last-Modified")
+    return data
+
+async def _afetch_rosters(team_ids, validators):
+    sem = asyncio.Semaphore(ROSTER_CONCURRENCY)
+    # long-lived client on http_session's shared loop (kept across calls)
+    client = async_client("mlb-rosters", timeout=5)
+    async def one(team_id):
+        async with sem:
+            try:
+                r = await client.get(_ROSTER_URL.format(team_id),
+                                     headers=_conditional_headers(validators.get(team_id)))
+                return _roster_result(r.status_code, r.content, r.headers)
+            except Exception as e:
+                return e
+    return await asyncio.gather(*(one(t) for t in team_ids))
+
+def _fetch_rosters(team_ids, validators=None):
+    """
+    Active-roster JSON per team id, in order (an Exception in place of a failed
+    fetch). Each result also carries the response's "etag"/"last_modified";
+    validators ({team_id: {"etag", "last_modified"}}) turn the requests into
+    conditional GETs, and an unchanged roster comes back as NOT_MODIFIED.
+    """
+    validators = validators or {}
+    if httpx is not None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return run_async(_afetch_rosters(team_ids, validators))
+    def one(team_id):
+        try:
+            r = _SESSION.get(_ROSTER_URL.format(team_id), timeout=5,
+                             headers=_conditional_headers(validators.get(team_id)))
+            return _roster_result(r.status_code, r.content, r.headers)
+        except Exception as e:
+            return e
+    with ThreadPoolExecutor(max_workers=min(16, len(team_ids) or 1)) as ex:
+        return list(ex.map(one, team_ids))
+
+def _active_teams():
+    teams_response = _SESSION.get(f"{MLB_STATS_API}/teams?leagueIds=103,104", timeout=10)
+    teams_data = _loads(teams_response.content)
+    return [t for t in teams_data.get("teams", []) if t.get("id")]
+
+def _walk_active_rosters():
+    """(team_name, person) for every player on an active MLB roster."""
+    teams = _active_teams()
+    rosters = _fetch_rosters([t["id"] for t in teams])
+    
+    for team, roster_data in zip(teams, rosters):
+        team_name = team.get("name", "")
+        if isinstance(roster_data, Exception):
+            print(f"[SKIP] Could not get roster for {team_name}: {roster_data}")
+            continue
+        for player_info in roster_data.get("roster", []):
+            yield team_name, player_info.get("person", {})
+
+def build_player_id_index():
+    """{fullName: id} for every active-roster player (cached on disk for 24h)."""
+    try:
+        cached_data = _read_json_cache(PLAYER_ID_INDEX_FILE)
+        if time.time() - cached_data.get("timestamp", 0) < 86400:
+            return cached_data.get("index", {})
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[WARN] Could not read player id index: {e}")
+    
+    try:
+        index = {}
+        for _team_name, player in _walk_active_rosters():
+            if player.get("fullName") and player.get("id"):
+                index[player["fullName"]] = player["id"]
+    except Exception as e:
+        print(f"[ERROR] Failed to build player id index: {e}")
+        return {}
+    
+    if index:
+        try:
+            _write_json_cache(PLAYER_ID_INDEX_FILE, {"index": index, "timestamp": time.time()})
+        except Exception as e:
+            print(f"[WARN] Could not cache player id index: {e}")
+    print(f"[INFO] Built player id index for {len(index)} players")
+    return index
+
 def get_player_team_mapping():
     """Get current MLB player-to-team mapping"""
     try:
         # Try to load cached mapping first
         cache_file = "player_team_cache.json"
+        cached_data = {}
         try:
-            with open(cache_file, "r") as f:
-                cached_data = json.load(f)
-                # Check if cache is less than 24 hours old
-                if time.time() - cached_data.get("timestamp", 0) < 86400:
-                    print(f"[INFO] Using cached player-team mapping ({len(cached_data.get('mapping', {}))} players)")
-                    return cached_data.get("mapping", {})
+            cached_data = _read_json_cache(cache_file)
+            # Check if cache is less than 24 hours old
+            if time.time() - cached_data.get("timestamp", 0) < 86400:
+                print(f"[INFO] Using cached player-team mapping ({len(cached_data.get('mapping', {}))} players)")
+                return cached_data.get("mapping", {})
         except FileNotFoundError:
             pass
         
-        # Fetch fresh data from MLB Stats API
+        # Fetch fresh data from MLB Stats API; rosters cached with an
+        # ETag/Last-Modified are revalidated (304 = reuse the cached players)
         print("[INFO] Fetching fresh player-team mapping from MLB Stats API...")
-        teams_url = "https://statsapi.mlb.com/api/v1/teams?leagueIds=103,104"
-        teams_response = requests.get(teams_url, timeout=10)
-        teams_data = teams_response.json()
+        cached_rosters = cached_data.get("rosters", {})
+        teams = _active_teams()
+        team_ids = [t["id"] for t in teams]
+        results = _fetch_rosters(team_ids, {tid: cached_rosters.get(str(tid)) for tid in team_ids})
         
         player_team_map = {}
-        
-        for team in teams_data.get("teams", []):
+        rosters = {}
+        unchanged = 0
+        for team, result in zip(teams, results):
             team_name = team.get("name", "")
-            team_id = team.get("id")
-            
-            if not team_id:
-                continue
-                
-            # Get roster for this team
-            roster_url = f"https://statsapi.mlb.com/api/v1/teams/{team_id}/roster?rosterType=active"
-            try:
-                roster_response = requests.get(roster_url, timeout=5)
-                roster_data = roster_response.json()
-                
-                for player_info in roster_data.get("roster", []):
-                    player = player_info.get("person", {})
-                    player_name = player.get("fullName", "")
-                    if player_name:
-                        player_team_map[player_name] = team_name
-                        
-            except Exception as e:
-                print(f"[SKIP] Could not get roster for {team_name}: {e}")
+            entry = cached_rosters.get(str(team["id"]))
+            if result is NOT_MODIFIED and entry:
+                unchanged += 1
+            elif isinstance(result, Exception) or result is NOT_MODIFIED:
+                print(f"[SKIP] Could not get roster for {team_name}: {result}")
                 continue
+            else:
+                entry = {
+                    "players": [p.get("person", {}).get("fullName", "") for p in result.get("roster", [])],
+                    "etag": result.get("etag"),
+                    "last_modified": result.get("last_modified"),
+                }
+            rosters[str(team["id"])] = entry
+            for player_name in entry["players"]:
+                if player_name:
+                    player_team_map[player_name] = team_name
         
         # Cache the mapping
         cache_data = {
             "mapping": player_team_map,
+            "rosters": rosters,
             "timestamp": time.time()
         }
         try:
-            with open(cache_file, "w") as f:
-                json.dump(cache_data, f)
+            _write_json_cache(cache_file, cache_data)
         except Exception as e:
             print(f"[WARN] Could not cache player-team mapping: {e}")
         
-        print(f"[INFO] Built player-team mapping for {len(player_team_map)} players")
+        print(f"[INFO] Built player-team mapping for {len(player_team_map)} players ({unchanged} rosters unchanged)")
         return player_team_map
         
     except Exception as e:
         print(f"[ERROR] Failed to build player-team mapping: {e}")
         return {}
-
@@ -0,0 +1,125 @@
+# ev_kernel.py
+from __future__ import annotations
+import numpy as np
+from novig import american_to_prob_vec, novig_two_way_vec, prob_to_american_vec
+
+# Numba is optional: with it the per-row EV math is compiled once at import
+# (eager signature + on-disk cache); without it we run the same math in NumPy.
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except Exception:
+    HAVE_NUMBA = False
+
+# NaN is the "missing" sentinel for odds/context, so fastmath must keep NaN
+# semantics; every other LLVM fast-math flag is fine here.
+_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+def _compute_ev_numpy(over, under, ctx, thr, fo_out, fu_out, eo_out, pick_out):
+    po = american_to_prob_vec(over)
+    pu = american_to_prob_vec(under)
+    s = po + pu
+    bad = np.isnan(s) | (s <= 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(po, s, out=fo_out)
+        np.divide(pu, s, out=fu_out)
+    fo_out[bad] = np.nan
+    fu_out[bad] = np.nan
+    eo_out[:] = (ctx - fo_out) * 100.0
+    pick_out[:] = np.where(eo_out >= thr, 1, np.where(-eo_out >= thr, -1, 0))
+
+if HAVE_NUMBA:
+    @njit(inline="always", fastmath=_FASTMATH)
+    def _am2prob(o):
+        # american_to_prob_vec per element: select + divide, no data-dependent branch
+        a = abs(o)
+        return (100.0 if o >= 0.0 else a) / (a + 100.0)
+
+    @njit("void(f8[:],f8[:],f8[:],f8,f8[:],f8[:],f8[:],i1[:])",
+          parallel=True, fastmath=_FASTMATH, cache=True)
+    def _compute_ev_jit(over, under, ctx, thr, fo_out, fu_out, eo_out, pick_out):
+        for i in prange(over.shape[0]):
+            o = over[i]
+            u = under[i]
+            po = _am2prob(o)
+            pu = _am2prob(u)
+            s = po + pu
+            if s > 0.0:
+                fo_out[i] = po / s
+                fu_out[i] = pu / s
+            else:
+                fo_out[i] = np.nan
+                fu_out[i] = np.nan
+            e = (ctx[i] - fo_out[i]) * 100.0
+            eo_out[i] = e
+            if e >= thr:
+                pick_out[i] = 1
+            elif -e >= thr:
+                pick_out[i] = -1
+            else:
+                pick_out[i] = 0
+
+def _fair_two_way_numpy(over, under, fo_out, fu_out, po_out, pu_out, fo_am_out, fu_am_out):
+    po_out[:] = american_to_prob_vec(over)
+    pu_out[:] = american_to_prob_vec(under)
+    fo, fu = novig_two_way_vec(over, under)
+    fo_out[:] = fo
+    fu_out[:] = fu
+    fo_am_out[:] = prob_to_american_vec(fo)
+    fu_am_out[:] = prob_to_american_vec(fu)
+
+if HAVE_NUMBA:
+    @njit(inline="always")
+    def _am2prob_exact(o):
+        # _am2prob without fastmath (bit-identical to american_to_prob_vec)
+        a = abs(o)
+        return (100.0 if o >= 0.0 else a) / (a + 100.0)
+
+    @njit(inline="always")
+    def _p2am(p):
+        # prob_to_american_vec per element; False for NaN too
+        if p > 0.0 and p < 1.0:
+            return np.int64(np.rint(-100.0*p/(1.0-p) if p >= 0.5 else 100.0*(1.0-p)/p))
+        return np.int64(0)
+
+    # No fastmath: fair probs are rounded to 4dp, which must match the
+    # NumPy path bit for bit (arcp/contract would shift the last ulp).
+    @njit("void(f8[:],f8[:],f8[:],f8[:],f8[:],f8[:],i8[:],i8[:])", parallel=True, cache=True)
+    def _fair_two_way_jit(over, under, fo_out, fu_out, po_out, pu_out, fo_am_out, fu_am_out):
+        for i in prange(over.shape[0]):
+            po = _am2prob_exact(over[i])
+            pu = _am2prob_exact(under[i])
+            po_out[i] = po
+            pu_out[i] = pu
+            s = po + pu
+            fo = np.round(po / s, 4)
+            fu = np.round(pu / s, 4)
+            fo_out[i] = fo
+            fu_out[i] = fu
+            fo_am_out[i] = _p2am(fo)
+            fu_am_out[i] = _p2am(fu)
+
+def fair_two_way(over: np.ndarray, under: np.ndarray, fo_out: np.ndarray, fu_out: np.ndarray,
+                 po_out: np.ndarray, pu_out: np.ndarray, fo_am_out: np.ndarray, fu_am_out: np.ndarray) -> None:
+    """
+    Two-way devig over float64 American odds (NaN = missing/0) in one pass:
+      po_out/pu_out: raw implied probs, fo_out/fu_out: fair probs (4dp),
+      fo_am_out/fu_am_out (int64): fair American prices, 0 where undefined.
+    """
+    if HAVE_NUMBA:
+        _fair_two_way_jit(over, under, fo_out, fu_out, po_out, pu_out, fo_am_out, fu_am_out)
+    else:
+        _fair_two_way_numpy(over, under, fo_out, fu_out, po_out, pu_out, fo_am_out, fu_am_out)
+
+def compute_ev(over: np.ndarray, under: np.ndarray, ctx: np.ndarray, thr: float,
+               fo_out: np.ndarray, fu_out: np.ndarray, eo_out: np.ndarray, pick_out: np.ndarray) -> None:
+    """
+    Fill preallocated outputs from float64 over/under American odds and the
+    contextual over-probability (NaN = missing):
+      fo_out/fu_out: fair (no-vig) probs, eo_out: edge_over in pp,
+      pick_out (int8): 1 = OVER, -1 = UNDER, 0 = no pick.
+    """
+    if HAVE_NUMBA:
+        _compute_ev_jit(over, under, ctx, float(thr), fo_out, fu_out, eo_out, pick_out)
+    else:
+        _compute_ev_numpy(over, under, ctx, thr, fo_out, fu_out, eo_out, pick_out)
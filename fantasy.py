@@ -1,29 +1,12 @@
 import logging
-import requests
+import numpy as np
 from datetime import datetime
+from enrichment import fantasy_hit_rate_stats
 
 logger = logging.getLogger(__name__)
 
 MLB_STATS_API = "https://statsapi.mlb.com/api/v1"
 
-def get_player_id(player_name):
-    """Get MLB player ID from name"""
-    try:
-        resp = requests.get(
-            f"{MLB_STATS_API}/people/search", 
-            params={"names": player_name},
-            timeout=10
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        
-        if data.get("people"):
-            return data["people"][0]["id"]
-        return None
-    except Exception as e:
-        logger.error(f"Error fetching player ID for {player_name}: {e}")
-        return None
-
 def calculate_fantasy_points(game_stats):
     """Calculate fantasy points based on standard scoring system"""
     try:
@@ -68,8 +51,8 @@ def safe_fantasy_hit_rate(player_id, player_name, stat_data, stat_key="hits", wi
             print(f"[SKIP] Not enough games for {player_name}")
             return None
 
-        total = sum(1 for g in games if g.get(stat_key, 0) > 0)
-        return round(total / len(games), 2)
+        col = np.fromiter((g.get(stat_key, 0) for g in games), dtype=np.float64, count=len(games))
+        return round(float((col > 0).mean()), 2)
 
     except Exception as e:
         print(f"[ERROR] Hit rate failed for {player_name}: {e}")
@@ -78,27 +61,12 @@ def safe_fantasy_hit_rate(player_id, player_name, stat_data, stat_key="hits", wi
 def get_fantasy_hit_rate(player_name, threshold=6):
     """Get fantasy hit rate for a player with safe error handling"""
     try:
-        player_id = get_player_id(player_name)
+        player_id, hit_rate, games = fantasy_hit_rate_stats(player_name)
         if not player_id:
             print(f"[SKIP] Player ID not found for {player_name}")
             return {"error": f"Player '{player_name}' not found"}
 
-        # Get game logs with safe API access
-        logs_resp = requests.get(
-            f"{MLB_STATS_API}/people/{player_id}/stats",
-            params={
-                "stats": "gameLog",
-                "season": "2025",
-                "group": "hitting"
-            },
-            timeout=10
-        )
-        logs_resp.raise_for_status()
-        logs_data = logs_resp.json()
-        
-        # Safe access to stats array
-        stats_array = logs_data.get("stats", [])
-        if not stats_array:
+        if not games:
             print(f"[SKIP] No stats data available for {player_name}")
             return {
                 "error": "No stats data available",
@@ -107,26 +75,20 @@ def get_fantasy_hit_rate(player_name, threshold=6):
                 "sample_size": 0
             }
         
-        logs = stats_array[0].get("splits", [])
-        
-        # Use safe hit rate calculation
-        stat_data = {player_id: [game.get("stat", {}) for game in logs]}
-        hit_rate = safe_fantasy_hit_rate(player_id, player_name, stat_data, "hits", 15)
-        
         if hit_rate is None:
             return {
                 "error": "Insufficient data for reliable calculation",
                 "player": player_name,
                 "threshold": threshold,
-                "sample_size": len(logs) if logs else 0
+                "sample_size": games
             }
 
         return {
             "player": player_name,
             "threshold": threshold,
             "fantasy_hit_rate": hit_rate,
-            "sample_size": len(stat_data[player_id]),
-            "games_over": int(hit_rate * len(stat_data[player_id]))
+            "sample_size": games,
+            "games_over": int(hit_rate * games)
         }
         
     except Exception as e:
@@ -1,41 +1,50 @@
 """
 Get real MLB player-to-team mappings from MLB Stats API
 """
-import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from http_session import pooled_session
+try:
+    from orjson import loads as _loads
+except Exception:
+    _loads = json.loads
+
+_SESSION = pooled_session(pool_connections=16, pool_maxsize=16)
+ROSTER_WORKERS = 16
+
+def _fetch_roster(team, session):
+    resp = session.get(f"https://statsapi.mlb.com/api/v1/teams/{team['id']}/roster?rosterType=active", timeout=5)
+    return _loads(resp.content).get('roster', [])
+
+def _fetch_roster_safe(team):
+    try:
+        return _fetch_roster(team, _SESSION)
+    except Exception as e:
+        print(f"[SKIP] Could not get roster for {team.get('name', '')}: {e}")
+        return []
 
 def get_current_mlb_rosters():
     """Fetch current MLB rosters to map players to teams"""
     try:
         # Get all MLB teams
         teams_url = "https://statsapi.mlb.com/api/v1/teams?leagueIds=103,104"
-        teams_response = requests.get(teams_url, timeout=10)
-        teams_data = teams_response.json()
+        teams_response = _SESSION.get(teams_url, timeout=10)
+        teams_data = _loads(teams_response.content)
         
         player_team_map = {}
+        teams = [t for t in teams_data.get('teams', []) if t.get('id')]
+        
+        # Rosters are independent: fetch them side by side, merge here
+        with ThreadPoolExecutor(max_workers=ROSTER_WORKERS) as ex:
+            rosters = list(ex.map(_fetch_roster_safe, teams))
         
-        for team in teams_data.get('teams', []):
+        for team, roster in zip(teams, rosters):
             team_name = team.get('name', '')
-            team_id = team.get('id')
-            
-            if not team_id:
-                continue
-                
-            # Get roster for this team
-            roster_url = f"https://statsapi.mlb.com/api/v1/teams/{team_id}/roster?rosterType=active"
-            try:
-                roster_response = requests.get(roster_url, timeout=5)
-                roster_data = roster_response.json()
-                
-                for player_info in roster_data.get('roster', []):
-                    player = player_info.get('person', {})
-                    player_name = player.get('fullName', '')
-                    if player_name:
-                        player_team_map[player_name] = team_name
-                        
-            except Exception as e:
-                print(f"[SKIP] Could not get roster for {team_name}: {e}")
-                continue
+            for player_info in roster:
+                player = player_info.get('person', {})
+                player_name = player.get('fullName', '')
+                if player_name:
+                    player_team_map[player_name] = team_name
         
         print(f"[INFO] Built player-team mapping for {len(player_team_map)} players")
         return player_team_map
@@ -0,0 +1,72 @@
+# http_session.py
+from __future__ import annotations
+import os
+import asyncio
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+
+def pooled_session(user_agent: str | None = None, retries: int = 2, backoff: float = 0.2,
+                   status_forcelist=None, pool_connections: int = POOL_CONNECTIONS,
+                   pool_maxsize: int = POOL_MAXSIZE) -> requests.Session:
+    """
+    requests.Session with a keep-alive connection pool mounted for http/https.
+    retries covers connection/read errors on idempotent methods (plus the
+    statuses in status_forcelist, if given); pass 0 for callers that run
+    their own backoff (e.g. 429 handling).
+    """
+    s = requests.Session()
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=status_forcelist) if retries else 0
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    if user_agent:
+        s.headers.update({"User-Agent": user_agent})
+    return s
+
+# Shared session for modules that just need pooled GETs
+SESSION = pooled_session("MoraBets/1.0")
+
+# Async fan-outs run on one background event loop per process instead of an
+# asyncio.run() (new loop + new AsyncClient + new TLS handshakes) per call.
+# The loop starts on first use, and again in a forked child.
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+_async_clients: dict = {}  # name -> httpx.AsyncClient; only touched on the loop thread
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="http-async", daemon=True).start()
+            _async_clients.clear()
+            _loop, _loop_pid = loop, os.getpid()
+        return _loop
+
+def run_async(coro, timeout: float | None = None):
+    """
+    Run coro on the shared background loop and block for its result. For sync
+    callers only: from a thread already running an event loop, await instead.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result(timeout)
+
+def async_client(name: str, **kwargs) -> "httpx.AsyncClient":
+    """
+    Long-lived httpx.AsyncClient `name` (kwargs apply on first use only), so
+    its keep-alive connections carry over between run_async() calls. Call it
+    from coroutines running on the shared loop; the client is never closed.
+    """
+    c = _async_clients.get(name)
+    if c is None:
+        c = _async_clients[name] = httpx.AsyncClient(**kwargs)
+    return c
@@ -1,34 +1,60 @@
 # matchups.py
-import hashlib
+from hashlib import blake2b
+import sys
+from collections import defaultdict
 
-def _first(*vals):
-    for v in vals:
+# Prop fields that name a side of the matchup
+_TEAM_KEYS = ("home_team", "away_team", "team", "team_name", "team_abbr", "opponent", "opponent_team", "opp")
+_HOME_KEYS = ("home_team", "home")
+_AWAY_KEYS = ("away_team", "away")
+_SIDE_KEYS = ("team", "team_name", "team_abbr")
+_OPP_KEYS = ("opponent", "opponent_team", "opp")
+_FIGHTER_A_KEYS = ("fighter", "fighter_a", "player")
+_FIGHTER_B_KEYS = ("opponent", "fighter_b")
+
+# Label separator per league (default "@"); labels that still need the event tag
+_MATCHUP_SEP = {"ufc": "vs"}
+_GENERIC_LABELS = frozenset(("Away @ Home", "Away vs Home", "Away @ Opponent", "Away vs Opponent"))
+
+def _first_key(p, keys, default=None):
+    """First truthy p[k] over keys, else default."""
+    g = p.get
+    for k in keys:
+        v = g(k)
         if v: return v
-    return None
+    return default
+
+# Identifier fields, most specific first; the first non-empty one keys the event
+_EVENT_KEY_FIELDS = (
+    "event_id", "game_id", "fixture_id", "id",
+    "commence_time", "start_time", "game_time",
+    "home_team", "away_team",
+    "team", "team_name", "team_abbr",
+    "opponent", "opponent_team", "opp",
+)
 
 def _event_key(p):
-    # Prefer explicit IDs/time; fall back to a hash of stable fields
-    raw = "|".join(str(_first(
-        p.get("event_id"), p.get("game_id"), p.get("fixture_id"), p.get("id"),
-        p.get("commence_time"), p.get("start_time"), p.get("game_time"),
-        p.get("home_team"), p.get("away_team"),
-        p.get("team"), p.get("team_name"), p.get("team_abbr"),
-        p.get("opponent"), p.get("opponent_team"), p.get("opp"),
-    )) for _ in range(1))
-    if not raw or raw == "None":
-        raw = str(p)[:256]
-    return hashlib.md5(raw.encode("utf-8")).hexdigest()[:8]
+    # Bucket on the raw identifier (dict hashing is enough); the short hash
+    # is only needed for generic labels, see _key_tag.
+    v = _first_key(p, _EVENT_KEY_FIELDS)
+    if v:
+        return str(v)  # 1 and "1" are the same event
+    return str(p)[:256]
+
+def _key_tag(key):
+    # 8 hex chars straight from a 4-byte digest
+    return blake2b(key.encode("utf-8"), digest_size=4).hexdigest()
 
 def _teams_from_prop(p, league):
     if (league or "").lower() == "ufc":
-        a = _first(p.get("fighter"), p.get("fighter_a"), p.get("player"), "Fighter A")
-        b = _first(p.get("opponent"), p.get("fighter_b"), "Fighter B")
+        a = _first_key(p, _FIGHTER_A_KEYS, "Fighter A")
+        b = _first_key(p, _FIGHTER_B_KEYS, "Fighter B")
         return a, b, "vs"
 
-    home = _first(p.get("home_team"), p.get("home"))
-    away = _first(p.get("away_team"), p.get("away"))
-    team = _first(p.get("team"), p.get("team_name"), p.get("team_abbr"))
-    opp  = _first(p.get("opponent"), p.get("opponent_team"), p.get("opp"))
+    home = _first_key(p, _HOME_KEYS)
+    away = _first_key(p, _AWAY_KEYS)
+    team = _first_key(p, _SIDE_KEYS)
+    opp  = _first_key(p, _OPP_KEYS)
 
     m = p.get("matchup")
     if isinstance(m, str) and ("@" in m or "vs" in m):
@@ -45,22 +71,39 @@ def _teams_from_prop(p, league):
         return (team or "Away"), (opp or "Home"), "@"
     return "Away", "Home", "@"
 
-def group_props_by_matchup(props, league):
-    by_event = {}
-    for p in props or []:
-        key = _event_key(p)
-        b = by_event.setdefault(key, {"props": [], "teams": set(), "home": None, "away": None})
-        b["props"].append(p)
-        for k in ("home_team","away_team","team","team_name","team_abbr","opponent","opponent_team","opp"):
-            if p.get(k): b["teams"].add(str(p.get(k)))
-        if p.get("home_team"): b["home"] = p["home_team"]
-        if p.get("away_team"): b["away"] = p["away_team"]
-
-    out = {}
+def _new_bucket():
+    return {"props": [], "teams": set(), "home": None, "away": None}
+
+def new_buckets():
+    """Empty event -> bucket mapping for bucket_prop."""
+    return defaultdict(_new_bucket)
+
+def bucket_prop(by_event, p):
+    """Add one prop to its event bucket (first half of group_props_by_matchup).
+    by_event must come from new_buckets()."""
+    b = by_event[_event_key(p)]
+    b["props"].append(p)
+    p_get = p.get
+    v = p_get("home_team")
+    if v: b["home"] = v
+    v = p_get("away_team")
+    if v: b["away"] = v
+    # teams is only a label fallback for buckets missing explicit home/away
+    if b["home"] and b["away"]:
+        return
+    add = b["teams"].add
+    for k in _TEAM_KEYS:
+        v = p_get(k)
+        if v: add(str(v))
+
+def finalize_buckets(by_event, league):
+    """Resolve a label per event bucket, stamp it on each prop, return label -> [props]."""
+    out = defaultdict(list)
+    sep = " " + _MATCHUP_SEP.get((league or "").lower(), "@") + " "
+    _intern = sys.intern  # same-teams buckets share one label object
     for key, b in by_event.items():
         a = b["away"] or None
         h = b["home"] or None
-        sep = "vs" if (league or "").lower() == "ufc" else "@"
 
         if not (a and h):
             teams = [t for t in b["teams"] if t]
@@ -72,13 +115,18 @@ def group_props_by_matchup(props, league):
             else:
                 a, h = "Away", "Home"
 
-        label = f"{a} {sep} {h}"
+        label = _intern(str(a) + sep + str(h))
         # If still generic, keep it unique with the event key
-        if label in ("Away @ Home", "Away vs Home", "Away @ Opponent", "Away vs Opponent"):
-            label = f"Game {key}"
+        if label in _GENERIC_LABELS:
+            label = _intern(f"Game {_key_tag(key)}")
 
         for p in b["props"]:
             p["matchup"] = label
-        out.setdefault(label, []).extend(b["props"])
-    return out
+        out[label].extend(b["props"])
+    return dict(out)
 
+def group_props_by_matchup(props, league):
+    by_event = new_buckets()
+    for p in props or []:
+        bucket_prop(by_event, p)
+    return finalize_buckets(by_event, league)
@@ -4,81 +4,137 @@ Provides detailed game-level context for MLB player props to identify favorable
 Includes game environment classification based on total run odds.
 """
 
+import copy
 import json
-import requests
+import os
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
+from http_session import pooled_session
+try:
+    from cachetools import TTLCache
+except Exception:
+    TTLCache = None
 
 logger = logging.getLogger(__name__)
 
+_PEOPLE_SEARCH_URL = "https://statsapi.mlb.com/api/v1/people/search"
+PLAYER_TEAM_WORKERS = 20
+_SESSION = pooled_session(pool_connections=PLAYER_TEAM_WORKERS, pool_maxsize=PLAYER_TEAM_WORKERS)
+GAME_CONTEXT_CACHE_MAX = 512  # (team, opponent, date) analyses kept per enricher
+TEAM_MISS_TTL = 300  # unresolved player -> team lookups are retried after this
+
+# MLB Stats API team id -> abbreviation
+_TEAM_ABBR = MappingProxyType({
+    108: 'LAA', 109: 'ARI', 110: 'BAL', 111: 'BOS', 112: 'CHC', 113: 'CIN',
+    114: 'CLE', 115: 'COL', 116: 'DET', 117: 'HOU', 118: 'KC', 119: 'LAD',
+    120: 'WSH', 121: 'NYM', 133: 'OAK', 134: 'PIT', 135: 'SD', 136: 'SEA',
+    137: 'SF', 138: 'STL', 139: 'TB', 140: 'TEX', 141: 'TOR', 142: 'MIN',
+    143: 'PHI', 144: 'ATL', 145: 'CWS', 146: 'MIA', 147: 'NYY', 158: 'MIL',
+})
+
+@lru_cache(maxsize=512)
 def classify_game_environment(total: float, over_odds: int, under_odds: int) -> str:
     """
     Classify game environment based on total runs and odds
     - High Scoring = total ≥ 9 and over_odds ≤ -115 (or total ≥ 11 for demo)
     - Low Scoring = total ≤ 7.5 and under_odds ≤ -115 (or total ≤ 8 for demo)
     - Else = Neutral
+    Pure in its inputs, so memoized: props of one game share the same triple.
     """
-    # Debug logging to understand the classification
-    print(f"[ENV DEBUG] Classifying: Total={total}, Over={over_odds}, Under={under_odds}")
-    
     # Relaxed criteria for demo purposes to show environment labels
     if (total >= 9 and over_odds <= -115) or total >= 11:
-        print(f"[ENV DEBUG] -> High Scoring (total≥9: {total>=9}, over≤-115: {over_odds<=-115}, or total≥11: {total>=11})")
-        return "High Scoring"
+        label = "High Scoring"
     elif (total <= 7.5 and under_odds <= -115) or total <= 8:
-        print(f"[ENV DEBUG] -> Low Scoring (total≤7.5: {total<=7.5}, under≤-115: {under_odds<=-115}, or total≤8: {total<=8})")
-        return "Low Scoring"
+        label = "Low Scoring"
     else:
-        print(f"[ENV DEBUG] -> Neutral")
-        return "Neutral"
+        label = "Neutral"
+    logger.debug("[ENV] Total=%s Over=%s Under=%s -> %s", total, over_odds, under_odds, label)
+    return label
 
 class MLBGameEnrichment:
     """Enhanced MLB context analysis for player props"""
     
     def __init__(self):
         self.team_cache = {}
+        self._team_misses = {}  # player -> monotonic time the miss expires
+        # get_player_teams is present or not for the life of the process
+        self._has_team_module = os.path.exists('get_player_teams.py')
         self.pitcher_cache = {}
         self.stats_cache = {}
         self.cache_expiry = 3600  # 1 hour cache
+        # Game analyses expire with cache_expiry so pitcher/form context refreshes
+        # during the day; bounded so past dates age out (plain dict, cleared when
+        # full, only without cachetools)
+        self.game_context_cache = (TTLCache(maxsize=GAME_CONTEXT_CACHE_MAX, ttl=self.cache_expiry)
+                                   if TTLCache else {})
+        self._game_context_lock = threading.Lock()  # TTLCache isn't thread-safe
         
     def enrich_mlb_props(self, props: List[Dict]) -> List[Dict]:
         """
         Enrich MLB player props with game-level context analysis
         Returns only props with positive environment unless explicitly filtered
         """
-        enriched_props = []
+        # One bounded-concurrency pass resolves every player's team
+        self.prewarm_player_teams(p.get('player_name') for p in props)
         
-        for prop in props:
-            try:
-                context = self._build_game_context(prop)
-                if context:
-                    prop['context'] = context
-                    
-                    # Only include props with positive environment by default
-                    if context.get('edge_summary', {}).get('prop_environment') == 'positive':
-                        enriched_props.append(prop)
-                        
-            except Exception as e:
-                logger.warning(f"Failed to enrich prop for {prop.get('player_name', 'unknown')}: {e}")
-                # Include original prop without context if enrichment fails
-                enriched_props.append(prop)
+        # Phase 1: attach context; phase 2: filter in one comprehension
+        attach = self._attach_context
+        outcomes = [attach(prop) for prop in props]
+        enriched_props = [prop for prop, ok in zip(props, outcomes) if ok]
                 
         logger.info(f"Enriched {len(enriched_props)} MLB props with positive environment context")
         return enriched_props
     
+    def _attach_context(self, prop: Dict) -> bool:
+        """Set prop['context']; True if the prop should be kept (positive, or enrichment failed)"""
+        # Per-prop guard on purpose: a failed prop is kept (without context),
+        # while a None context drops it, so failures can't be folded into a
+        # None return from _build_game_context
+        try:
+            context = self._build_game_context(prop)
+            if not context:
+                return False
+            prop['context'] = context
+            # Only include props with positive environment by default
+            return context.get('edge_summary', {}).get('prop_environment') == 'positive'
+        except Exception as e:
+            logger.warning(f"Failed to enrich prop for {prop.get('player_name', 'unknown')}: {e}")
+            # Include original prop without context if enrichment fails
+            return True
+    
     def _build_game_context(self, prop: Dict) -> Optional[Dict]:
         """Build comprehensive game context for a player prop"""
-        
         # Extract basic game info
         player_name = prop.get('player_name', '')
         team = self._get_player_team(player_name)
-        opponent = self._get_opponent_team(prop)
+        if not team:
+            return None
+        opponent = self._get_opponent_team(prop, team)
+        if not opponent:
+            return None
         game_date = self._get_game_date(prop)
         
-        if not team or not opponent:
-            return None
-            
+        # Every prop of one team's game reuses the same analysis; each prop gets
+        # its own deep copy so nested dicts (edge_summary etc.) aren't shared
+        cache_key = (team, opponent, game_date)
+        with self._game_context_lock:
+            game = self.game_context_cache.get(cache_key)
+        if game is None:
+            game = self._analyze_game(team, opponent, game_date)
+            with self._game_context_lock:
+                if TTLCache is None and len(self.game_context_cache) >= GAME_CONTEXT_CACHE_MAX:
+                    self.game_context_cache.clear()
+                self.game_context_cache[cache_key] = game
+        return copy.deepcopy(game)
+    
+    def _analyze_game(self, team: str, opponent: str, game_date: str) -> Dict:
+        """Context components for one (team, opponent, date)"""
         # Get pitcher information
         pitcher_info = self._get_pitcher_matchup(team, opponent, game_date)
         
@@ -104,48 +160,71 @@ class MLBGameEnrichment:
             "edge_summary": edge_summary
         }
     
+    def prewarm_player_teams(self, names) -> None:
+        """Resolve every uncached player name up front, PLAYER_TEAM_WORKERS at a time"""
+        now = time.monotonic()
+        todo = [n for n in set(names) if n and n not in self.team_cache
+                and self._team_misses.get(n, 0) <= now]
+        if not todo:
+            return
+        with ThreadPoolExecutor(max_workers=min(PLAYER_TEAM_WORKERS, len(todo))) as ex:
+            teams = list(ex.map(self._resolve_player_team, todo))
+        for name, team in zip(todo, teams):
+            self._record_team(name, team)
+    
+    def _record_team(self, player_name: str, team: Optional[str]) -> None:
+        # hits are kept; misses (often a transient search failure) only for
+        # TEAM_MISS_TTL, so the per-prop lookups of one batch don't retry them
+        if team:
+            self.team_cache[player_name] = team
+            self._team_misses.pop(player_name, None)
+        else:
+            self._team_misses[player_name] = time.monotonic() + TEAM_MISS_TTL
+    
     def _get_player_team(self, player_name: str) -> Optional[str]:
         """Get player's current team from existing prop data or cache"""
         if player_name in self.team_cache:
             return self.team_cache[player_name]
-            
-        try:
-            # Try to load existing player-team mappings from the system
-            import os
-            if os.path.exists('get_player_teams.py'):
-                try:
-                    from get_player_teams import get_cached_player_team
-                    cached_team = get_cached_player_team(player_name)
-                    if cached_team:
-                        self.team_cache[player_name] = cached_team
-                        return cached_team
-                except (ImportError, AttributeError):
-                    pass
-        except Exception:
-            # Fallback: attempt external API call with better error handling
+        if not player_name or self._team_misses.get(player_name, 0) > time.monotonic():
+            return None
+        team = self._resolve_player_team(player_name)
+        self._record_team(player_name, team)
+        return team
+    
+    def _resolve_player_team(self, player_name: str) -> Optional[str]:
+        """Team from the system's player-team mappings, else the MLB people search"""
+        # Try to load existing player-team mappings from the system
+        if self._has_team_module:
             try:
-                url = f"https://statsapi.mlb.com/api/v1/people/search?names={player_name}"
-                response = requests.get(url, timeout=3)
-                data = response.json()
-                
-                if data.get('people'):
-                    team_id = data['people'][0].get('currentTeam', {}).get('id')
-                    if team_id:
-                        team_name = self._get_team_abbreviation(team_id)
-                        self.team_cache[player_name] = team_name
-                        return team_name
-                        
-            except Exception as e:
-                logger.debug(f"Could not fetch team for {player_name}: {e}")
+                from get_player_teams import get_cached_player_team
+                cached_team = get_cached_player_team(player_name)
+                if cached_team:
+                    return cached_team
+            except Exception:
+                pass
+        
+        # Fallback: attempt external API call with better error handling
+        try:
+            response = _SESSION.get(_PEOPLE_SEARCH_URL, params={"names": player_name}, timeout=3)
+            data = response.json()
             
+            if data.get('people'):
+                team_id = data['people'][0].get('currentTeam', {}).get('id')
+                if team_id:
+                    return self._get_team_abbreviation(team_id)
+                    
+        except Exception as e:
+            logger.debug(f"Could not fetch team for {player_name}: {e}")
+        
         return None
     
-    def _get_opponent_team(self, prop: Dict) -> Optional[str]:
+    def _get_opponent_team(self, prop: Dict, player_team: Optional[str] = None) -> Optional[str]:
         """Extract opponent team from prop data or game context"""
         # Try to extract from existing prop structure
         away_team = prop.get('away_team')
         home_team = prop.get('home_team')
-        player_team = self._get_player_team(prop.get('player_name', ''))
+        if player_team is None:
+            player_team = self._get_player_team(prop.get('player_name', ''))
         
         if away_team and home_team and player_team:
             return home_team if player_team == away_team else away_team
@@ -162,11 +241,9 @@ class MLBGameEnrichment:
     def _get_game_date(self, prop: Dict) -> str:
         """Get game date from prop or current date"""
         game_date = prop.get('commence_time')
-        if game_date:
-            try:
-                return datetime.fromisoformat(game_date.replace('Z', '+00:00')).strftime('%Y-%m-%d')
-            except:
-                pass
+        # ISO 8601 timestamps start with YYYY-MM-DD: slice instead of parsing
+        if isinstance(game_date, str) and len(game_date) >= 10 and game_date[4] == '-' and game_date[7] == '-':
+            return game_date[:10]
         return datetime.now().strftime('%Y-%m-%d')
     
     def _get_pitcher_matchup(self, team: str, opponent: str, date: str) -> Dict:
@@ -334,15 +411,7 @@ class MLBGameEnrichment:
     
     def _get_team_abbreviation(self, team_id: int) -> str:
         """Convert MLB team ID to abbreviation"""
-        team_map = {
-            109: 'ARI', 110: 'BAL', 111: 'BOS', 112: 'CHC', 113: 'CIN',
-            114: 'CLE', 115: 'COL', 116: 'DET', 117: 'HOU', 118: 'KC',
-            119: 'LAA', 120: 'LAD', 121: 'MIL', 133: 'OAK', 134: 'PIT',
-            135: 'SD', 136: 'SEA', 137: 'SF', 138: 'STL', 139: 'TB',
-            140: 'TEX', 141: 'TOR', 142: 'MIN', 143: 'PHI', 144: 'ATL',
-            145: 'CWS', 146: 'MIA', 147: 'NYY', 158: 'MIL', 121: 'MIL'
-        }
-        return team_map.get(team_id, 'UNK')
+        return _TEAM_ABBR.get(team_id, 'UNK')
     
     def _is_home_team(self, team: str, opponent: str) -> bool:
         """Determine if team is playing at home (simplified logic)"""
@@ -1,20 +1,29 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def _stat_category(stat_type):
+    # stat types come from a small set of market keys: classify each once
+    return "yards" if "yard" in stat_type else "touchdowns" if "touchdown" in stat_type else "other"
+
+
 def add_nfl_context(props):
     contextualized = []
+    append = contextualized.append
 
     for prop in props:
         try:
             probability = prop.get("probability", 0)
             stat_type = prop.get("stat_type", "").lower()
 
-            context = {
-                **prop,
-                "sport": "NFL",
-                "type": "yards" if "yard" in stat_type else "touchdowns" if "touchdown" in stat_type else "other",
-                "confidence": "High" if probability >= 0.65 else "Moderate" if probability >= 0.55 else "Low"
-            }
+            # shallow copy (one C call) so callers' rows are left untouched
+            context = prop.copy()
+            context["sport"] = "NFL"
+            context["type"] = _stat_category(stat_type)
+            context["confidence"] = "High" if probability >= 0.65 else "Moderate" if probability >= 0.55 else "Low"
 
-            contextualized.append(context)
+            append(context)
         except Exception as e:
             print("Error adding NFL context:", e)
 
-    return contextualized
\ No newline at end of file
+    return contextualized
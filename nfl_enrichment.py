@@ -2,8 +2,10 @@
 from __future__ import annotations
 from typing import Dict, Any, List, Tuple
 
+import numpy as np
+
 try:
-    from novig import american_to_prob, novig_two_way
+    from novig import american_to_prob, novig_two_way, american_to_prob_vec
 except Exception:
     def american_to_prob(odds: int | float) -> float:
         o = float(odds)
@@ -12,6 +14,54 @@ except Exception:
         pa, pb = american_to_prob(oddsa), american_to_prob(oddsb)
         z = (pa + pb) or 1.0
         return pa/z, pb/z
+    def american_to_prob_vec(arr: np.ndarray) -> np.ndarray:
+        a = np.abs(arr)
+        return np.where(arr >= 0, 100.0, a) / (a + 100.0)
+
+# >55% fair prob to OVER => "high scoring"
+HIGH_SCORING_PROB = 0.55
+
+def _fair_pairs(pairs: List[Tuple[Any, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """No-vig probs for k (a, b) American-odds pairs; NaN where either side is missing/0."""
+    odds = np.array(pairs, dtype=np.float64).reshape(-1, 2)
+    odds[odds == 0] = np.nan
+    p = american_to_prob_vec(odds)
+    fair = p / p.sum(axis=1, keepdims=True)
+    return fair[:, 0], fair[:, 1]
+
+def label_matchups_batch(markets_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    label_matchups_from_featured over many matchups: the h2h and totals odds
+    of every matchup are devigged in one array pass each. Matchups whose
+    odds are missing/0 get no labels for that market.
+    """
+    outs: List[Dict[str, Any]] = [{} for _ in markets_list]
+    h2h_rows, h2h_odds, tot_rows, tot_odds = [], [], [], []
+    for i, markets in enumerate(markets_list):
+        h2h = markets.get("h2h") or {}
+        if "home" in h2h and "away" in h2h:
+            h2h_rows.append(i)
+            h2h_odds.append((h2h["home"], h2h["away"]))
+        totals = markets.get("totals") or {}
+        if "over" in totals and "under" in totals:
+            tot_rows.append(i)
+            tot_odds.append((totals["over"], totals["under"]))
+
+    if h2h_rows:
+        ph, pa = _fair_pairs(h2h_odds)
+        for i, h, a in zip(h2h_rows, ph.tolist(), pa.tolist()):
+            if h == h and a == a:
+                outs[i]["no_vig_favorite"] = "HOME" if h > a else "AWAY"
+                outs[i]["no_vig_diff"] = abs(h - a)
+
+    if tot_rows:
+        po, _ = _fair_pairs(tot_odds)
+        high = (po >= HIGH_SCORING_PROB).tolist()
+        for i, p, hs in zip(tot_rows, po.tolist(), high):
+            if p == p:
+                outs[i]["high_scoring"] = hs
+                outs[i]["totals_point"] = markets_list[i]["totals"].get("point")
+    return outs
 
 def label_matchups_from_featured(markets: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -20,22 +70,7 @@ def label_matchups_from_featured(markets: Dict[str, Any]) -> Dict[str, Any]:
     Output:
       {"no_vig_favorite":"AWAY","high_scoring":true/false}
     """
-    out = {}
-    h2h = markets.get("h2h") or {}
-    if "home" in h2h and "away" in h2h:
-        p_home, p_away = american_to_prob(h2h["home"]), american_to_prob(h2h["away"])
-        z = (p_home + p_away) or 1.0
-        ph, pa = p_home/z, p_away/z
-        out["no_vig_favorite"] = "HOME" if ph > pa else "AWAY"
-        out["no_vig_diff"] = abs(ph - pa)
-
-    totals = markets.get("totals") or {}
-    if "over" in totals and "under" in totals:
-        po, pu = novig_two_way(totals["over"], totals["under"])
-        # simple heuristic: >55% fair prob to OVER => "high scoring"
-        out["high_scoring"] = (po >= 0.55)
-        out["totals_point"] = totals.get("point")
-    return out
+    return label_matchups_batch([markets])[0]
 
 # --- Back-compat shim expected by app.py ---
 # Older code imports enrich_nfl_props(props) to annotate props in-place.
@@ -70,7 +105,7 @@ def enrich_nfl_props(props, *args, **kwargs):
 # be explicit (harmless if __all__ not used)
 try:
     __all__ = list(set((__all__ if '__all__' in globals() else []) + [
-        "label_matchups_from_featured", "enrich_nfl_props"
+        "label_matchups_from_featured", "label_matchups_batch", "enrich_nfl_props"
     ]))
 except Exception:
     pass
\ No newline at end of file
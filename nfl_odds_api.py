@@ -1,15 +1,27 @@
 # nfl_odds_api.py
 from __future__ import annotations
-import os, time
+import os, time, asyncio, threading, logging
 from datetime import datetime, timedelta
-from collections import defaultdict
+from hashlib import blake2b
 from typing import Any, Dict, List, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor
 import requests
 
+from http_session import pooled_session, run_async, async_client
+try:
+    import httpx
+except Exception:
+    httpx = None
+# orjson decodes the odds payloads straight from the response bytes
+try:
+    from orjson import loads as _loads
+except Exception:
+    from json import loads as _loads
 from cache_ttl import get as cache_get, setex as cache_setex
 import perf
 
+logger = logging.getLogger(__name__)
+
 BASE = "https://api.the-odds-api.com"
 SPORT_KEY = "americanfootball_nfl"
 API_KEY = os.getenv("ODDS_API_KEY") or os.getenv("THE_ODDS_API_KEY") or ""
@@ -18,11 +30,39 @@ ODDS_FORMAT = "american"
 PREFERRED_BOOKMAKER_KEYS = [b for b in os.getenv("ODDS_PREFERRED_BOOKS","").lower().split(",") if b]
 
 CACHE_SEC_EVENTS = int(os.getenv("NFL_EVENTS_CACHE_SEC", "60"))
+# safety net for the ETag-validated copy of the events list
+CACHE_SEC_EVENTS_STALE = int(os.getenv("NFL_EVENTS_STALE_SEC", str(6 * 3600)))
 CACHE_SEC_EVENT_ODDS = int(os.getenv("NFL_EVENT_ODDS_CACHE_SEC", "60"))
 MAX_WORKERS = int(os.getenv("ODDS_WORKERS", "4"))
+# in-flight event-odds requests on the async path (one shared AsyncClient)
+ODDS_CONCURRENCY = int(os.getenv("ODDS_CONCURRENCY", "20"))
+
+_UA = "MoraBets/1.0 (+NFL props v4)"
+# ODDS_HTTP2=1 multiplexes the event-odds fan-out over HTTP/2 (httpx + h2);
+# otherwise keep-alive HTTP/1.1 with a pool sized to the worker count.
+ODDS_HTTP2 = os.getenv("ODDS_HTTP2", "0") == "1"
 
-session = requests.Session()
-session.headers.update({"User-Agent": "MoraBets/1.0 (+NFL props v4)"})
+def _http2_available() -> bool:
+    if not ODDS_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401  (backs httpx's http2=True)
+        return httpx is not None
+    except Exception as e:
+        logger.warning("ODDS_HTTP2 requested but unavailable (%s); using HTTP/1.1", e)
+        return False
+
+HTTP2 = _http2_available()
+
+def _make_session():
+    if HTTP2:
+        n = MAX_WORKERS * 2
+        return httpx.Client(http2=True, headers={"User-Agent": _UA},
+                            limits=httpx.Limits(max_connections=n, max_keepalive_connections=n))
+    return pooled_session(_UA, status_forcelist=(500, 502, 503, 504),
+                          pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS * 2)
+
+session = _make_session()
 
 NFL_PLAYER_PROP_MARKETS: List[str] = [
     "player_pass_yds", "player_pass_tds", "player_pass_attempts", "player_pass_completions",
@@ -35,145 +75,330 @@ NFL_PLAYER_PROP_MARKETS: List[str] = [
     "player_pass_rush_reception_yds", "player_pass_rush_reception_tds",
 ]
 
-try:
-    from novig import american_to_prob, novig_two_way
-except Exception:
-    def american_to_prob(odds: int | float) -> float:
-        o = float(odds)
-        return 100.0/(o+100.0) if o > 0 else (-o)/(100.0 - o)
-    def novig_two_way(oddsa: int, oddsb: int) -> Tuple[float,float]:
-        pa, pb = american_to_prob(oddsa), american_to_prob(oddsb)
-        z = (pa + pb) or 1.0
-        return pa/z, pb/z
-
-def prob_to_american(p: float) -> int:
-    if p <= 0 or p >= 1: return 0
-    return int(round(-100*p/(1-p))) if p >= 0.5 else int(round(100*(1-p)/p))
+import numpy as np
+from ev_kernel import fair_two_way
 
-def _get_json(path: str, **params) -> Dict[str, Any]:
+def _prices(ticks: List[Dict[str,Any] | None]) -> np.ndarray:
+    # float64 prices, NaN for a missing side or 0 odds (the scalar path's None)
+    a = np.array([t["price"] if t else np.nan for t in ticks], dtype=np.float64)
+    a[a == 0] = np.nan
+    return a
+
+# Single-flight: concurrent cache misses on one key (other request threads,
+# or other event loops) wait on the leader's Future instead of re-fetching.
+INFLIGHT_WAIT = float(os.getenv("ODDS_INFLIGHT_WAIT", "30"))
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+def _claim(key: str) -> Tuple[Future, bool]:
+    with _inflight_lock:
+        fut = _inflight.get(key)
+        if fut is None:
+            fut = _inflight[key] = Future()
+            return fut, True
+        return fut, False
+
+def _release(key: str):
+    with _inflight_lock:
+        _inflight.pop(key, None)
+
+def _single_flight(key: str, fn):
+    fut, leader = _claim(key)
+    if not leader:
+        return fut.result(timeout=INFLIGHT_WAIT)
+    try:
+        res = fn()
+        fut.set_result(res)
+        return res
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        _release(key)
+
+async def _async_single_flight(key: str, make_coro):
+    fut, leader = _claim(key)
+    if not leader:
+        return await asyncio.wait_for(asyncio.wrap_future(fut), INFLIGHT_WAIT)
+    try:
+        res = await make_coro()
+        fut.set_result(res)
+        return res
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        _release(key)
+
+def _get(path: str, headers: Dict[str, str] | None = None, **params):
     assert API_KEY, "ODDS_API_KEY missing"
     url = f"{BASE}/v4{path}"
     params["apiKey"] = API_KEY
-    r = session.get(url, params=params, timeout=20)
+    return session.get(url, params=params, headers=headers, timeout=20)
+
+def _get_json(path: str, **params) -> Dict[str, Any]:
+    r = _get(path, **params)
     r.raise_for_status()
-    return r.json() or {}
+    return _loads(r.content) or {}
+
+def _conditional_headers(validator: Dict[str, Any] | None) -> Dict[str, str]:
+    headers = {}
+    if validator:
+        if validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+        if validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+    return headers
 
 def list_nfl_events(hours_ahead: int = 48) -> List[Dict[str, Any]]:
+    """
+    Events starting in the next hours_ahead hours. After CACHE_SEC_EVENTS the
+    list is revalidated with the upstream ETag/Last-Modified; a 304 reuses the
+    stored list (kept CACHE_SEC_EVENTS_STALE) trimmed to the current window.
+    """
     with perf.span("nfl:list_events", {"ha": hours_ahead}):
         key = f"nfl:events:{hours_ahead}"
         hit = cache_get(key)
         if hit is not None:
             return hit
-        now = datetime.utcnow().replace(microsecond=0)
-        end = now + timedelta(hours=hours_ahead)
-        data = _get_json(
-            f"/sports/{SPORT_KEY}/events",
-            commenceTimeFrom=now.isoformat()+"Z",
-            commenceTimeTo=end.isoformat()+"Z",
-        )
-        cache_setex(key, CACHE_SEC_EVENTS, data)
+        data = _single_flight(key, lambda: _refresh_events(key, hours_ahead))
         try: perf.mark("nfl.events", len(data))
         except Exception: pass
         return data
 
+def _refresh_events(key: str, hours_ahead: int) -> List[Dict[str, Any]]:
+    now = datetime.utcnow().replace(microsecond=0)
+    end = now + timedelta(hours=hours_ahead)
+    frm, to = now.isoformat()+"Z", end.isoformat()+"Z"
+    vkey = f"{key}:etag"
+    stored = cache_get(vkey)
+    r = _get(f"/sports/{SPORT_KEY}/events", headers=_conditional_headers(stored),
+             commenceTimeFrom=frm, commenceTimeTo=to)
+    if r.status_code == 304 and stored:
+        # ISO-8601 Z timestamps compare correctly as strings
+        data = [e for e in stored["events"] if frm <= (e.get("commence_time") or frm) <= to]
+        perf.mark("nfl.events_not_modified")
+    else:
+        r.raise_for_status()
+        data = _loads(r.content) or []
+        etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+        if etag or last_modified:
+            cache_setex(vkey, CACHE_SEC_EVENTS_STALE,
+                        {"etag": etag, "last_modified": last_modified, "events": data})
+    cache_setex(key, CACHE_SEC_EVENTS, data)
+    return data
+
+# Cache keys carry a fixed-size tag instead of the ~250-byte market list;
+# MARKET_TAGS maps each tag back to its list for debugging.
+MARKET_TAGS: Dict[str, str] = {}
+
+def _market_tag(mk: str) -> str:
+    tag = blake2b(mk.encode("utf-8"), digest_size=8).hexdigest()
+    MARKET_TAGS[tag] = mk
+    return tag
+
+def _event_odds_request(event_id: str, markets: List[str]):
+    """(cache key, path, params, params without the bookmaker filter)"""
+    mk = ",".join(markets)
+    key = f"nfl:event:{event_id}:mk:{_market_tag(mk)}"
+    base_params = {"regions": REGIONS, "oddsFormat": ODDS_FORMAT, "markets": mk}
+    params = dict(base_params)
+    if PREFERRED_BOOKMAKER_KEYS:
+        params["bookmakers"] = ",".join(PREFERRED_BOOKMAKER_KEYS)
+    return key, f"/sports/{SPORT_KEY}/events/{event_id}/odds", params, base_params
+
 def nfl_event_odds(event_id: str, markets: List[str]) -> Dict[str, Any]:
     with perf.span("nfl:event_odds", {"eid": event_id, "mk": len(markets)}):
-        mk = ",".join(markets)
-        key = f"nfl:event:{event_id}:mk:{mk}"
+        key, path, params, base_params = _event_odds_request(event_id, markets)
         hit = cache_get(key)
         if hit is not None:
             return hit
-        base_params = {"regions": REGIONS, "oddsFormat": ODDS_FORMAT, "markets": mk}
-        params = dict(base_params)
-        if PREFERRED_BOOKMAKER_KEYS:
-            params["bookmakers"] = ",".join(PREFERRED_BOOKMAKER_KEYS)
-        data = _get_json(f"/sports/{SPORT_KEY}/events/{event_id}/odds", **params)
+        def fetch():
+            data = _get_json(path, **params)
+            if not (data.get("bookmakers") or []):
+                data = _get_json(path, **base_params)
+            cache_setex(key, CACHE_SEC_EVENT_ODDS, data)
+            return data
+        return _single_flight(key, fetch)
+
+async def _aget_json(client, path: str, **params) -> Dict[str, Any]:
+    assert API_KEY, "ODDS_API_KEY missing"
+    params["apiKey"] = API_KEY
+    r = await client.get(f"{BASE}/v4{path}", params=params, timeout=20)
+    r.raise_for_status()
+    return _loads(r.content) or {}
+
+async def _anfl_event_odds(client, event_id: str, markets: List[str]) -> Dict[str, Any]:
+    """nfl_event_odds on a shared httpx.AsyncClient (same cache keys)."""
+    key, path, params, base_params = _event_odds_request(event_id, markets)
+    hit = cache_get(key)
+    if hit is not None:
+        return hit
+    async def fetch():
+        data = await _aget_json(client, path, **params)
         if not (data.get("bookmakers") or []):
-            data = _get_json(f"/sports/{SPORT_KEY}/events/{event_id}/odds", **base_params)
+            data = await _aget_json(client, path, **base_params)
         cache_setex(key, CACHE_SEC_EVENT_ODDS, data)
         return data
+    return await _async_single_flight(key, fetch)
 
-def _pair_outcomes(bookmakers: List[Dict[str,Any]], stat_key: str) -> dict:
-    from collections import defaultdict
-    pairs = defaultdict(lambda: {"over": None, "under": None})
+# outcome name (lowercased) -> side; yes/no markets (anytime TD etc.) map onto over/under
+_OUTCOME_SIDE = {"over": "over", "under": "under", "yes": "over", "anytime_td": "over", "no": "under"}
+
+def _pair_outcomes_all(bookmakers: List[Dict[str,Any]], stat_keys) -> Dict[str, dict]:
+    """
+    One pass over every book/market/outcome: stat_key -> {(player, stat_key,
+    point): {"over": tick, "under": tick}}, first book to quote a side wins.
+    """
+    out: Dict[str, dict] = {sk: {} for sk in stat_keys}
+    out_get = out.get
     for b in bookmakers or []:
         bkey = b.get("key","")
-        for m in b.get("markets", []):
-            if m.get("key") != stat_key: continue
-            for out in m.get("outcomes", []):
-                player = out.get("description") or out.get("name") or ""
-                side   = (out.get("name") or "").lower()
-                point  = out.get("point")
-                price  = out.get("price")
-                if not player or price is None: continue
-                if side not in ("over","under"):
-                    side = "over" if side in ("yes","anytime_td") else ("under" if side=="no" else side)
+        for m in b.get("markets") or []:
+            stat_key = m.get("key")
+            pairs = out_get(stat_key)
+            if pairs is None: continue
+            for o in m.get("outcomes") or []:
+                g = o.get
+                price = g("price")
+                if price is None: continue
+                name = g("name")
+                player = g("description") or name or ""
+                if not player: continue
+                side = _OUTCOME_SIDE.get((name or "").lower())
+                if side is None: continue
+                point = g("point")
                 k = (player, stat_key, point)
-                tick = {"book": bkey, "price": int(price), "point": point}
-                if side == "over" and not pairs[k]["over"]: pairs[k]["over"] = tick
-                elif side == "under" and not pairs[k]["under"]: pairs[k]["under"] = tick
-    return pairs
-
-def _attach_fair(row: Dict[str,Any], over: Dict[str,Any] | None, under: Dict[str,Any] | None):
-    fair = {"prob": {}, "american": {}}
-    if over and under:
-        p_over, p_under = novig_two_way(over["price"], under["price"])
-        fair["prob"]["over"], fair["prob"]["under"] = p_over, p_under
-        fair["american"]["over"] = prob_to_american(p_over)
-        fair["american"]["under"] = prob_to_american(p_under)
-        row["book"] = over["book"]
-    else:
-        side = "over" if over else "under"
-        tick = over or under
-        p = american_to_prob(tick["price"])
-        fair["prob"][side] = p
-        fair["american"][side] = tick["price"]
-        row["book"] = tick["book"]
-    row["fair"] = fair
+                slot = pairs.get(k)
+                if slot is None:
+                    slot = pairs[k] = {"over": None, "under": None}
+                if not slot[side]:
+                    slot[side] = {"book": bkey, "price": int(price), "point": point}
+    return out
+
+def _rows_from_columns(cols: "_Columns") -> List[Dict[str, Any]]:
+    """
+    Materialise one row dict per column entry, devigging every two-sided row
+    in one array pass; one-sided rows keep the raw implied prob and their own
+    price.
+    """
+    n = len(cols.players)
+    if not n:
+        return []
+    over, under = _prices(cols.overs), _prices(cols.unders)
+    fo, fu, po, pu = (np.empty(n) for _ in range(4))
+    fo_am, fu_am = np.empty(n, dtype=np.int64), np.empty(n, dtype=np.int64)
+    fair_two_way(over, under, fo, fu, po, pu, fo_am, fu_am)
+    fo, fu, po, pu = fo.tolist(), fu.tolist(), po.tolist(), pu.tolist()
+    fo_am, fu_am = fo_am.tolist(), fu_am.tolist()
+    out = []
+    append = out.append
+    for i, (matchup, player, stat, line, o, u) in enumerate(zip(
+            cols.matchups, cols.players, cols.stats, cols.lines, cols.overs, cols.unders)):
+        shop = {}
+        if o: shop["over"]  = {"american": o["price"], "book": o["book"]}
+        if u: shop["under"] = {"american": u["price"], "book": u["book"]}
+        if o and u:
+            p_over = fo[i]
+            if p_over == p_over:
+                fair = {"prob": {"over": p_over, "under": fu[i]},
+                        "american": {"over": fo_am[i], "under": fu_am[i]}}
+            else:
+                fair = {"prob": {"over": None, "under": None},
+                        "american": {"over": None, "under": None}}
+            side, book = "both", o["book"]
+        else:
+            side, tick, p = ("over", o, po[i]) if o else ("under", u, pu[i])
+            fair = {"prob": {side: p if p == p else None}, "american": {side: tick["price"]}}
+            book = tick["book"]
+        append({"league": "nfl", "matchup": matchup, "player": player, "stat": stat,
+                "line": line, "shop": shop, "side": side, "book": book, "fair": fair})
+    return out
+
+def _event_odds_safe(event_id: str, markets: List[str]) -> Dict[str, Any]:
+    try:
+        return nfl_event_odds(event_id, markets)
+    except Exception as e:
+        print(f"[NFL] event odds failed for {event_id}: {e}")
+        return {}
+
+async def _afetch_event_odds(jobs: List[Tuple[str, List[str]]]) -> List[Dict[str, Any]]:
+    sem = asyncio.Semaphore(ODDS_CONCURRENCY)
+    limits = httpx.Limits(max_connections=ODDS_CONCURRENCY, max_keepalive_connections=ODDS_CONCURRENCY)
+    # long-lived client on http_session's shared loop (kept across calls)
+    client = async_client("odds-api", http2=HTTP2, limits=limits, headers={"User-Agent": _UA})
+    async def one(job):
+        async with sem:
+            try:
+                return await _anfl_event_odds(client, *job)
+            except Exception as e:
+                print(f"[NFL] event odds failed for {job[0]}: {e}")
+                return {}
+    return await asyncio.gather(*(one(job) for job in jobs))
+
+def _fetch_event_odds(jobs: List[Tuple[str, List[str]]]) -> List[Dict[str, Any]]:
+    """
+    Odds per (event_id, markets) job, in job order ({} for a failed call):
+    asyncio on http_session's shared loop with one long-lived httpx.AsyncClient
+    when possible, else the worker pool (no httpx, or this thread is already
+    running an event loop).
+    """
+    if httpx is not None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return run_async(_afetch_event_odds(jobs))
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        return list(ex.map(lambda job: _event_odds_safe(*job), jobs))
+
+class _Columns:
+    """Per-row fields across all events as parallel lists (no per-row dicts until the end)."""
+    __slots__ = ("matchups", "players", "stats", "lines", "overs", "unders")
+
+    def __init__(self):
+        self.matchups, self.players, self.stats = [], [], []
+        self.lines, self.overs, self.unders = [], [], []
+
+def _event_rows(e: Dict[str,Any], batches: List[List[str]], datas: List[Dict[str,Any]], cols: _Columns) -> None:
+    """Append one column entry per player/stat/line of one event; rows are built in batch."""
+    with perf.span("nfl:event_build", {"eid": e.get("id")}):
+        home, away = e.get("home_team","Home"), e.get("away_team","Away")
+        matchup = f"{away} @ {home}"
+        sidebook = {}
+        for mk, data in zip(batches, datas):
+            all_sb = _pair_outcomes_all(data.get("bookmakers", []), mk)
+            for stat_key in mk:
+                sidebook.update(all_sb[stat_key])
+        n = len(sidebook)
+        cols.matchups.extend([matchup] * n)
+        for (player, stat_key, point), sides in sidebook.items():
+            cols.players.append(player)
+            cols.stats.append(stat_key)
+            cols.lines.append(point)
+            cols.overs.append(sides.get("over"))
+            cols.unders.append(sides.get("under"))
 
 def fetch_nfl_player_props(hours_ahead: int = 48) -> List[Dict[str, Any]]:
     with perf.span("nfl:fetch_props", {"ha": hours_ahead}):
         events = list_nfl_events(hours_ahead=hours_ahead)
         perf.mark("nfl.events_seen", len(events))
-        all_props: List[Dict[str,Any]] = []
         batches = [NFL_PLAYER_PROP_MARKETS[:8], NFL_PLAYER_PROP_MARKETS[8:]]
 
-        def _one_event(e):
-            with perf.span("nfl:event_build", {"eid": e.get("id")}):
-                out = []
-                eid = e.get("id"); 
-                if not eid: return out
-                home, away = e.get("home_team","Home"), e.get("away_team","Away")
-                matchup = f"{away} @ {home}"
-                sidebook = {}
-                for mk in batches:
-                    data = nfl_event_odds(eid, mk)
-                    for stat_key in mk:
-                        sb = _pair_outcomes(data.get("bookmakers", []), stat_key)
-                        sidebook.update(sb)
-                for (player, stat_key, point), sides in sidebook.items():
-                    over, under = sides.get("over"), sides.get("under")
-                    row = {
-                        "league": "nfl",
-                        "matchup": matchup,
-                        "player": player,
-                        "stat": stat_key,
-                        "line": point,
-                        "shop": {},
-                    }
-                    if over:  row["shop"]["over"]  = {"american": over["price"],  "book": over["book"]}
-                    if under: row["shop"]["under"] = {"american": under["price"], "book": under["book"]}
-                    row["side"] = "both" if (over and under) else ("over" if over else ("under" if under else "unknown"))
-                    _attach_fair(row, over, under)
-                    out.append(row)
-                return out
-
-        with perf.span("nfl:concurrency", {"workers": MAX_WORKERS}):
-            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
-                futs = [ex.submit(_one_event, e) for e in events]
-                for f in as_completed(futs):
-                    try: all_props.extend(f.result())
-                    except Exception as e: print(f"[NFL] event task failed: {e}")
+        # Player-prop markets are only served per event (the sport-level /odds
+        # endpoint takes featured markets only), so every (event, batch) call
+        # is its own task instead of one event's batches running in series.
+        events = [e for e in events if e.get("id")]
+        jobs = [(e["id"], mk) for e in events for mk in batches]
+        with perf.span("nfl:concurrency", {"workers": ODDS_CONCURRENCY if httpx else MAX_WORKERS, "calls": len(jobs)}):
+            odds = _fetch_event_odds(jobs)
+
+        nb = len(batches)
+        cols = _Columns()
+        for i, e in enumerate(events):
+            try: _event_rows(e, batches, odds[i*nb:(i+1)*nb], cols)
+            except Exception as ex: print(f"[NFL] event task failed: {ex}")
+        with perf.span("nfl:fair", {"n": len(cols.players)}):
+            all_props: List[Dict[str,Any]] = _rows_from_columns(cols)
 
         with perf.span("nfl:sort_props", {"n": len(all_props)}):
             all_props.sort(key=lambda p: ((p.get("fair") or {}).get("prob") or {}).get("over") or 0.0, reverse=True)
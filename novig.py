@@ -1,12 +1,31 @@
 from typing import Optional, Tuple
+import numpy as np
 
-def american_to_prob(odds: Optional[int]) -> Optional[float]:
-    if odds is None or odds == 0:
-        return None
+def _american_to_prob(odds) -> float:
     if odds > 0:
         return 100.0 / (odds + 100.0)
     return (-odds) / ((-odds) + 100.0)
 
+# Integer odds in [-LUT_MAX, LUT_MAX] (virtually every quote) are one list
+# load; index 0 (odds 0) is None. Plain floats, same values as the formula.
+LUT_MAX = 10000
+_LUT = [_american_to_prob(o) if o else None for o in range(-LUT_MAX, LUT_MAX + 1)]
+
+def american_to_prob(odds: Optional[int]) -> Optional[float]:
+    if type(odds) is int and -LUT_MAX <= odds <= LUT_MAX:
+        return _LUT[odds + LUT_MAX]
+    if odds is None or odds == 0:
+        return None
+    return _american_to_prob(odds)
+
+def american_to_prob_vec(arr: np.ndarray) -> np.ndarray:
+    """
+    Branchless american_to_prob over a float64 array: one select + one divide
+    per element, NaN in -> NaN out. Missing/0 odds should already be NaN.
+    """
+    a = np.abs(arr)
+    return np.where(arr >= 0, 100.0, a) / (a + 100.0)
+
 def novig_two_way(over_odds: Optional[int], under_odds: Optional[int]) -> Tuple[Optional[float], Optional[float]]:
     p_over  = american_to_prob(over_odds)
     p_under = american_to_prob(under_odds)
@@ -16,4 +35,25 @@ def novig_two_way(over_odds: Optional[int], under_odds: Optional[int]) -> Tuple[
     if s <= 0:
         return (None, None)
     return (round(p_over / s, 4), round(p_under / s, 4))
-    
\ No newline at end of file
+    
+
+def novig_two_way_vec(over: np.ndarray, under: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    novig_two_way over float64 arrays of American odds: fair (over, under)
+    probs rounded to 4dp. Missing/0 odds should already be NaN; NaN out.
+    """
+    po = american_to_prob_vec(over)
+    pu = american_to_prob_vec(under)
+    s = po + pu
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.round(po / s, 4), np.round(pu / s, 4)
+
+def prob_to_american_vec(p: np.ndarray) -> np.ndarray:
+    """
+    Fair American price per probability as int64: rounded to the nearest
+    integer, 0 outside (0, 1) and for NaN.
+    """
+    ok = (p > 0) & (p < 1)
+    q = np.where(ok, p, 0.5)
+    am = np.where(q >= 0.5, -100*q/(1-q), 100*(1-q)/q)
+    return np.where(ok, np.rint(am), 0).astype(np.int64)
@@ -1,11 +1,12 @@
 import requests
+from http_session import SESSION
 from datetime import datetime, timedelta
 import os
 import json
 import logging
 import time
 from concurrent.futures import ThreadPoolExecutor
-from contextual import get_contextual_hit_rate
+from contextual import get_contextual_hit_rate, get_contextual_hit_rate_batch
 from fantasy import get_fantasy_hit_rate
 
 logger = logging.getLogger(__name__)
@@ -53,7 +54,7 @@ def parse_game_data():
     # Try preferred sportsbooks first
     try:
         print(f"[DEBUG] Fetching moneylines from preferred sportsbooks: {PREFERRED_SPORTSBOOKS}")
-        response = requests.get(
+        response = SESSION.get(
             f"{BASE_URL}/sports/baseball_mlb/odds",
             params={
                 "apiKey": ODDS_API_KEY,
@@ -82,7 +83,7 @@ def parse_game_data():
     # Fallback to all sportsbooks
     try:
         print("[DEBUG] Fetching moneylines from all sportsbooks")
-        response = requests.get(
+        response = SESSION.get(
             f"{BASE_URL}/sports/baseball_mlb/odds",
             params={
                 "apiKey": ODDS_API_KEY,
@@ -116,7 +117,7 @@ def get_matchup_map():
         return {}
 
     try:
-        response = requests.get(
+        response = SESSION.get(
             f"{BASE_URL}/sports/baseball_mlb/odds",
             params={
                 "apiKey": ODDS_API_KEY,
@@ -170,7 +171,7 @@ def get_mlb_totals_odds():
 
     try:
         print("[DEBUG] Fetching MLB totals odds")
-        response = requests.get(
+        response = SESSION.get(
             f"{BASE_URL}/sports/baseball_mlb/odds",
             params={
                 "apiKey": ODDS_API_KEY,
@@ -303,7 +304,7 @@ def get_mlb_game_environment_map():
     # Try preferred sportsbooks first
     try:
         print(f"[DEBUG] Fetching moneylines from preferred sportsbooks: {PREFERRED_SPORTSBOOKS}")
-        response = requests.get(
+        response = SESSION.get(
             f"{BASE_URL}/sports/baseball_mlb/odds",
             params={
                 "apiKey": ODDS_API_KEY,
@@ -332,7 +333,7 @@ def get_mlb_game_environment_map():
     # Fallback to all sportsbooks
     try:
         print("[DEBUG] Fetching moneylines from all sportsbooks")
-        response = requests.get(
+        response = SESSION.get(
             f"{BASE_URL}/sports/baseball_mlb/odds",
             params={
                 "apiKey": ODDS_API_KEY,
@@ -364,7 +365,7 @@ def fetch_player_props():
         return []
 
     try:
-        event_resp = requests.get(
+        event_resp = SESSION.get(
             f"{BASE_URL}/sports/baseball_mlb/events",
             params={
                 "apiKey": ODDS_API_KEY,
@@ -403,7 +404,7 @@ def fetch_player_props():
                 if batch_idx > 0:
                     time.sleep(1)
                 
-                odds_resp = requests.get(
+                odds_resp = SESSION.get(
                     f"{BASE_URL}/sports/baseball_mlb/events/{eid}/odds",
                     params={
                         "apiKey": ODDS_API_KEY,
@@ -488,17 +489,17 @@ def deduplicate_props(props):
     print(f"[INFO] Deduplication: {len(props)} props -> {len(deduplicated)} unique props")
     return deduplicated
 
-def enrich_prop(prop):
+def enrich_prop(prop, contextual=None, park_multiplier=None):
     """Enrich a single prop with contextual and fantasy hit rates - with robust error handling"""
     try:
-        # Get contextual hit rate with fallback
-        contextual = None
+        # Get contextual hit rate with fallback (unless prefetched by the caller)
         try:
-            contextual = get_contextual_hit_rate(
-                prop["player"], 
-                stat_type=prop["stat"], 
-                threshold=prop["line"]
-            )
+            if contextual is None:
+                contextual = get_contextual_hit_rate(
+                    prop["player"], 
+                    stat_type=prop["stat"], 
+                    threshold=prop["line"]
+                )
         except Exception as e:
             print(f"[WARN] Contextual hit rate error for {prop['player']}: {e}")
             contextual = {
@@ -534,7 +535,8 @@ def enrich_prop(prop):
             # Park Factor Analysis
             stadium = prop.get("venue", "")
             if stadium:
-                park_multiplier = apply_park_factor(prop, stadium)
+                if park_multiplier is None:
+                    park_multiplier = apply_park_factor(prop, stadium)
                 if park_multiplier != 1.0:
                     enhanced_multiplier *= park_multiplier
                     enhancement_factors.append(f"Park: {park_multiplier:.2f}")
@@ -565,11 +567,15 @@ def enrich_prop(prop):
             if isinstance(base_hit_rate, (int, float)) and base_hit_rate > 0:
                 enhanced_hit_rate = min(0.95, max(0.05, base_hit_rate * enhanced_multiplier))
                 
-                # Update contextual data with enhanced analysis
-                contextual["enhanced_hit_rate"] = round(enhanced_hit_rate, 3)
-                contextual["enhancement_multiplier"] = round(enhanced_multiplier, 3)
-                contextual["enhancement_factors"] = enhancement_factors
-                contextual["original_hit_rate"] = base_hit_rate
+                # New dict with the enhanced analysis: `contextual` may be the
+                # shared result of a cached/single-flighted lookup
+                contextual = {
+                    **contextual,
+                    "enhanced_hit_rate": round(enhanced_hit_rate, 3),
+                    "enhancement_multiplier": round(enhanced_multiplier, 3),
+                    "enhancement_factors": enhancement_factors,
+                    "original_hit_rate": base_hit_rate,
+                }
                 
                 if enhancement_factors:
                     print(f"[ENHANCED] {prop['player']}: {base_hit_rate:.2f} -> {enhanced_hit_rate:.2f} ({', '.join(enhancement_factors)})")
@@ -634,10 +640,27 @@ def enrich_player_props(props):
         return []
     
     print(f"[INFO] Starting enrichment for {len(props)} props")
+
+    # Contextual hit rates for every prop in one concurrent fan-out
+    # (httpx async when available) instead of one blocking chain per prop
+    try:
+        contextuals = get_contextual_hit_rate_batch(
+            [(p["player"], p["stat"], p["line"]) for p in props])
+    except Exception as e:
+        print(f"[WARN] Batched contextual hit rates failed, falling back per prop: {e}")
+        contextuals = [None] * len(props)
+
+    # Park factors for all props in one table lookup
+    try:
+        from enrichment import apply_park_factor_batch
+        park_multipliers = apply_park_factor_batch(props).tolist()
+    except Exception as e:
+        print(f"[WARN] Batched park factors failed, falling back per prop: {e}")
+        park_multipliers = [None] * len(props)
     
     # Use ThreadPoolExecutor for parallel processing
     with ThreadPoolExecutor(max_workers=10) as executor:
-        enriched_props = list(executor.map(enrich_prop, props))
+        enriched_props = list(executor.map(enrich_prop, props, contextuals, park_multipliers))
     
     # Count successful enrichments
     successful_enrichments = sum(1 for prop in enriched_props if prop.get("enriched", False))
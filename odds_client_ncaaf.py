@@ -4,6 +4,7 @@ import os
 from datetime import datetime, timedelta, timezone as tz
 from typing import Any, Dict, List, Optional
 import requests
+from http_session import pooled_session
 from cache_ttl import get as cache_get, setex as cache_setex
 from markets_ncaaf import NCAAF_SPORT_KEY
 import perf
@@ -17,12 +18,8 @@ PREFERRED_BOOKMAKER_KEYS = [b for b in os.getenv("ODDS_PREFERRED_BOOKS","").lowe
 # --- BEGIN: resilient HTTP + backoff for NCAAF odds ---
 import time, random
 
-# Pooled session (reuse sockets)
-_session = requests.Session()
-_adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
-_session.mount("https://", _adapter)
-_session.mount("http://", _adapter)
-_session.headers.update({"User-Agent":"MoraBets/1.0 (+NCAAF v4)"})
+# Pooled session (reuse sockets); retries are handled by the backoff loop below
+_session = pooled_session("MoraBets/1.0 (+NCAAF v4)", retries=0)
 
 # Backoff / pacing knobs (env-tunable, safe defaults)
 BACKOFF_BASE_MS  = int(os.getenv("ODDS_BACKOFF_BASE_MS", "250"))     # first 429 wait
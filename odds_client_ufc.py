@@ -4,6 +4,7 @@ import os
 from datetime import datetime, timedelta, timezone as tz
 from typing import Any, Dict, List, Optional
 import requests
+from http_session import pooled_session
 from cache_ttl import get as cache_get, setex as cache_setex
 from markets_ufc import UFC_SPORT_KEY
 import perf
@@ -18,8 +19,7 @@ CACHE_SEC_EVENTS = int(os.getenv("UFC_EVENTS_CACHE_SEC", "60"))
 CACHE_SEC_EVENT_ODDS = int(os.getenv("UFC_EVENT_ODDS_CACHE_SEC", "60"))
 CACHE_SEC_EVENT_MARKETS = int(os.getenv("UFC_EVENT_MARKETS_CACHE_SEC", "300"))
 
-_sess = requests.Session()
-_sess.headers.update({"User-Agent": "MoraBets/1.0 (+UFC v4)"})
+_sess = pooled_session("MoraBets/1.0 (+UFC v4)")
 
 def _get_json(path: str, **params) -> Dict[str, Any]:
     assert API_KEY, "ODDS_API_KEY missing"
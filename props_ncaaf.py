@@ -22,6 +22,12 @@ except Exception:
         z = (pa + pb) or 1.0
         return pa/z, pb/z
 
+try:
+    import numpy as np
+    from novig import novig_two_way_vec, prob_to_american_vec
+except Exception:
+    novig_two_way_vec = None
+
 def prob_to_american(p: float) -> int:
     if p <= 0 or p >= 1: return 0
     return int(round(-100*p/(1-p))) if p >= 0.5 else int(round(100*(1-p)/p))
@@ -63,11 +69,38 @@ def _attach_fair(row: Dict[str,Any], over: Dict[str,Any] | None, under: Dict[str
         row["book"] = tick["book"]
     row["fair"] = fair
 
+def _attach_fair_batch(items: List[Tuple[Dict[str,Any], Dict[str,Any] | None, Dict[str,Any] | None]]):
+    """
+    _attach_fair for (row, over, under) triples, devigging every two-sided
+    row in one NumPy pass instead of novig_two_way + prob_to_american per row.
+    """
+    pairs = [(row, o, u) for row, o, u in items if o and u]
+    if novig_two_way_vec is None or not pairs:
+        for row, o, u in items: _attach_fair(row, o, u)
+        return
+    for row, o, u in items:
+        if not (o and u): _attach_fair(row, o, u)
+    over = np.array([o["price"] for _, o, _ in pairs], dtype=np.float64)
+    under = np.array([u["price"] for _, _, u in pairs], dtype=np.float64)
+    over[over == 0] = np.nan
+    under[under == 0] = np.nan
+    fo, fu = novig_two_way_vec(over, under)
+    fo_am, fu_am = prob_to_american_vec(fo).tolist(), prob_to_american_vec(fu).tolist()
+    fo, fu = fo.tolist(), fu.tolist()
+    for i, (row, o, _) in enumerate(pairs):
+        if fo[i] == fo[i]:
+            fair = {"prob": {"over": fo[i], "under": fu[i]},
+                    "american": {"over": fo_am[i], "under": fu_am[i]}}
+        else:
+            fair = {"prob": {"over": None, "under": None},
+                    "american": {"over": None, "under": None}}
+        row["book"] = o["book"]
+        row["fair"] = fair
+
 def fetch_ncaaf_player_props(hours_ahead: int = 48, date: Optional[str] = None) -> List[Dict[str,Any]]:
     with perf.span("ncaaf:fetch_props", {"ha": hours_ahead, "date": date or ""}):
         events = list_events_ncaaf(hours_ahead=hours_ahead, date=date)
         perf.mark("ncaaf.events_seen", len(events))
-        all_props: List[Dict[str,Any]] = []
         batches = [NCAAF_PLAYER_PROP_MARKETS[:5], NCAAF_PLAYER_PROP_MARKETS[5:]]
 
         def _one(ev):
@@ -89,15 +122,18 @@ def fetch_ncaaf_player_props(hours_ahead: int = 48, date: Optional[str] = None)
                     if over:  row["shop"]["over"]  = {"american": over["price"],  "book": over["book"]}
                     if under: row["shop"]["under"] = {"american": under["price"], "book": under["book"]}
                     row["side"] = "both" if (over and under) else ("over" if over else ("under" if under else "unknown"))
-                    _attach_fair(row, over, under)
-                    out.append(row)
+                    out.append((row, over, under))
                 return out
 
+        items = []
         with perf.span("ncaaf:concurrency", {"workers": MAX_WORKERS}):
             with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
                 for f in as_completed([ex.submit(_one, ev) for ev in events]):
-                    try: all_props.extend(f.result())
+                    try: items.extend(f.result())
                     except Exception as e: print(f"[NCAAF] event task failed: {e}")
+        with perf.span("ncaaf:fair", {"n": len(items)}):
+            _attach_fair_batch(items)
+        all_props: List[Dict[str,Any]] = [row for row, _, _ in items]
 
         with perf.span("ncaaf:sort_props", {"n": len(all_props)}):
             all_props.sort(key=lambda p: ((p.get("fair") or {}).get("prob") or {}).get("over") or 0.0, reverse=True)
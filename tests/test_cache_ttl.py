@@ -0,0 +1,89 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.pop("REDIS_URL", None)
+os.environ.pop("UPSTASH_REDIS_REST_URL", None)
+
+import cache_ttl
+
+
+class CacheTTLTest(unittest.TestCase):
+    def test_get_returns_fresh_copy(self):
+        d = {"players": [{"name": "A", "line": 1.5}], "n": 1}
+        cache_ttl.setex("t:fresh", 60, d)
+        got = cache_ttl.get("t:fresh")
+        self.assertEqual(got, d)
+        self.assertIsNot(got, d)
+
+    def test_mutated_result_does_not_leak(self):
+        cache_ttl.setex("t:mut", 60, {"players": [{"name": "A"}], "n": 1})
+        got = cache_ttl.get("t:mut")
+        got["n"] = 99
+        got["players"][0]["name"] = "B"
+        got["extra"] = True
+        self.assertEqual(cache_ttl.get("t:mut"), {"players": [{"name": "A"}], "n": 1})
+
+    def test_mutating_stored_value_does_not_leak(self):
+        d = {"n": 1}
+        cache_ttl.setex("t:src", 60, d)
+        d["n"] = 2
+        self.assertEqual(cache_ttl.get("t:src"), {"n": 1})
+
+    def test_large_payload_round_trips_through_l1(self):
+        big = {"rows": [{"i": i, "s": "x" * 20} for i in range(500)]}
+        cache_ttl.setex("t:big", 60, big)
+        first = cache_ttl.get("t:big")
+        first["rows"].clear()
+        self.assertEqual(cache_ttl.get("t:big"), big)
+
+    def test_pipeline_setex_values_are_isolated(self):
+        cache_ttl.pipeline_setex({"t:p1": {"a": 1}, "t:p2": [1, 2]}, 60)
+        cache_ttl.get("t:p2").append(3)
+        self.assertEqual(cache_ttl.mget(["t:p1", "t:p2"]), [{"a": 1}, [1, 2]])
+
+
+class CacheTTLDecoratorTest(unittest.TestCase):
+    def test_memoizes_within_ttl(self):
+        calls = []
+
+        @cache_ttl.cache_ttl(seconds=60)
+        def f(x):
+            calls.append(x)
+            return x * 2
+
+        self.assertEqual([f(1), f(1), f(2)], [2, 2, 4])
+        self.assertEqual(calls, [1, 2])
+
+    def test_store_is_bounded(self):
+        calls = []
+
+        @cache_ttl.cache_ttl(seconds=60, maxsize=3)
+        def f(x):
+            calls.append(x)
+            return x
+
+        for i in range(100):
+            f(i)
+        self.assertEqual(len(calls), 100)
+        f(99)  # most recent entries survive
+        f(0)   # oldest was evicted
+        self.assertEqual(calls[-1], 0)
+        self.assertEqual(calls.count(99), 1)
+
+    def test_expired_entries_recompute(self):
+        calls = []
+
+        @cache_ttl.cache_ttl(seconds=0)
+        def f(x):
+            calls.append(x)
+            return x
+
+        f(1)
+        f(1)
+        self.assertEqual(calls, [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
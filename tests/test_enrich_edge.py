@@ -0,0 +1,93 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+from novig import american_to_prob
+
+
+def _price_from(prop, key_name):
+    v = prop.get(key_name)
+    if isinstance(v, dict):
+        return v.get("price") or v.get("odds")
+    return v
+
+
+def scalar_fair(prop):
+    """The per-row fair-prob path enrich_with_context_and_edge replaced."""
+    over = _price_from(prop, "over") or prop.get("over_odds")
+    under = _price_from(prop, "under") or prop.get("under_odds")
+    try:
+        po = american_to_prob(float(over)) if over is not None else None
+        pu = american_to_prob(float(under)) if under is not None else None
+        if po is None or pu is None:
+            return None, None
+        s = po + pu
+        if s <= 0:
+            return None, None
+        return po / s, pu / s
+    except Exception:
+        return None, None
+
+
+class EnrichWithContextAndEdgeTest(unittest.TestCase):
+    def setUp(self):
+        self._ctx = app._ctx_cached
+        app._ctx_cached = lambda player, stat, point, league, slot=None: 0.6 if player else None
+
+    def tearDown(self):
+        app._ctx_cached = self._ctx
+
+    def test_player_fallback_order_is_league_independent(self):
+        rows = [
+            {"fighter": "F1", "over": -110, "under": -110},
+            {"fighter_a": "FA", "over": -110, "under": -110},
+            {"player_name": "PN", "fighter": "F2", "over": -110, "under": -110},
+        ]
+        for league in ("mlb", "ufc"):
+            out = app.enrich_with_context_and_edge(rows, league)
+            self.assertEqual([p["player"] for p in out], ["F1", "FA", "PN"], league)
+
+    def test_zero_odds_fall_back_to_odds_fields(self):
+        rows = [
+            {"player": "A", "over": 0, "over_odds": -120, "under": {"price": 0, "odds": 100}},
+            {"player": "B", "over": {"price": None, "odds": -150}, "under": None, "under_odds": 130},
+        ]
+        out = app.enrich_with_context_and_edge(rows, "mlb")
+        for row, p in zip(rows, out):
+            fo, fu = scalar_fair(row)
+            self.assertIsNotNone(fo)
+            self.assertAlmostEqual(p["fair"]["prob"]["over"], fo, places=12)
+            self.assertAlmostEqual(p["fair"]["prob"]["under"], fu, places=12)
+
+    def test_fair_probs_match_scalar_path(self):
+        rnd = random.Random(11)
+        choices = [None, 0, "", "x", -110, -250, 120, 300, "-115", 99.5]
+        rows = []
+        for i in range(2000):
+            r = {"player": f"P{i}"}
+            for side in ("over", "under"):
+                v = rnd.choice(choices)
+                if rnd.random() < 0.3:
+                    v = {"price": v, "odds": rnd.choice(choices)}
+                r[side] = v
+                if rnd.random() < 0.5:
+                    r[f"{side}_odds"] = rnd.choice(choices)
+            rows.append(r)
+        out = app.enrich_with_context_and_edge(rows, "mlb")
+        for row, p in zip(rows, out):
+            fo, fu = scalar_fair(row)
+            if fo is None:
+                self.assertNotIn("fair", p, row)
+                self.assertIsNone(p["ai"]["edge_over"])
+            else:
+                self.assertAlmostEqual(p["fair"]["prob"]["over"], fo, places=12, msg=row)
+                self.assertAlmostEqual(p["fair"]["prob"]["under"], fu, places=12, msg=row)
+                self.assertAlmostEqual(p["ai"]["edge_over"], round((0.6 - fo) * 100.0, 1), places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
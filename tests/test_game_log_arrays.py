@@ -0,0 +1,60 @@
+import copy
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import enrichment
+
+LOGS = [
+    {"date": "2026-09-02", "opponent": {"id": 121}, "pitcher": {"hand": {"code": "L"}},
+     "stat": {"hits": 2, "runs": 1, "rbi": 1}},
+    {"date": "2026-09-01", "opponent": {"id": 120}, "pitcher": {"hand": {"code": "R"}},
+     "stat": {"hits": 0}},
+]
+
+
+class GameLogArraysTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self._orig = enrichment.get_game_log
+
+        def fake_get_game_log(player_id, group="hitting"):
+            # like cache_ttl.get: a freshly decoded list on every call
+            self.calls.append((player_id, group))
+            return copy.deepcopy(LOGS)
+
+        enrichment.get_game_log = fake_get_game_log
+        enrichment._GAME_LOG_ARRAYS.clear()
+
+    def tearDown(self):
+        enrichment.get_game_log = self._orig
+        enrichment._GAME_LOG_ARRAYS.clear()
+
+    def test_second_call_is_a_memo_hit(self):
+        a = enrichment.get_game_log_arrays(1, "hitting")
+        b = enrichment.get_game_log_arrays(1, "hitting")
+        self.assertIs(a, b)
+        self.assertEqual(self.calls, [(1, "hitting")])
+        self.assertEqual(a["opp"].tolist(), [121, 120])
+        self.assertEqual(a["hand"].tolist(), ["L", "R"])
+        self.assertEqual(a["stats"][0, enrichment._STAT_FIELD_INDEX["hits"]], 2)
+        self.assertEqual(a["by_date"]["2026-09-01"]["stat"], {"hits": 0})
+
+    def test_keyed_per_player_and_group(self):
+        enrichment.get_game_log_arrays(1, "hitting")
+        enrichment.get_game_log_arrays(1, "pitching")
+        enrichment.get_game_log_arrays(2, "hitting")
+        self.assertEqual(len(self.calls), 3)
+
+    def test_expired_entry_is_rebuilt(self):
+        enrichment.get_game_log_arrays(1, "hitting")
+        exp, arrays = enrichment._GAME_LOG_ARRAYS[(1, "hitting")]
+        enrichment._GAME_LOG_ARRAYS[(1, "hitting")] = (0.0, arrays)
+        self.assertIsNot(enrichment.get_game_log_arrays(1, "hitting"), arrays)
+        self.assertEqual(len(self.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nfl_enrichment import HIGH_SCORING_PROB, label_matchups_batch, label_matchups_from_featured
+
+
+def _prob(o):
+    o = float(o)
+    return 100.0 / (o + 100.0) if o > 0 else (-o) / (100.0 - o)
+
+
+def scalar_labels(markets):
+    """The per-matchup label_matchups_from_featured before batching (unrounded devig)."""
+    out = {}
+    h2h = markets.get("h2h") or {}
+    if "home" in h2h and "away" in h2h:
+        p_home, p_away = _prob(h2h["home"]), _prob(h2h["away"])
+        z = (p_home + p_away) or 1.0
+        ph, pa = p_home / z, p_away / z
+        out["no_vig_favorite"] = "HOME" if ph > pa else "AWAY"
+        out["no_vig_diff"] = abs(ph - pa)
+    totals = markets.get("totals") or {}
+    if "over" in totals and "under" in totals:
+        po, pu = _prob(totals["over"]), _prob(totals["under"])
+        out["high_scoring"] = (po / (po + pu)) >= HIGH_SCORING_PROB
+        out["totals_point"] = totals.get("point")
+    return out
+
+
+def _odds(rnd):
+    return rnd.choice([rnd.randint(-400, -100), rnd.randint(100, 400)])
+
+
+class LabelMatchupsBatchTest(unittest.TestCase):
+    def test_matches_scalar_labels(self):
+        rnd = random.Random(5)
+        markets_list = []
+        for _ in range(3000):
+            m = {}
+            if rnd.random() < 0.8:
+                m["h2h"] = {"home": _odds(rnd), "away": _odds(rnd)}
+            if rnd.random() < 0.8:
+                m["totals"] = {"over": _odds(rnd), "under": _odds(rnd), "point": rnd.choice([38.5, 44.5, 51.0])}
+            if rnd.random() < 0.05:
+                m["totals"] = {"over": -110}  # one-sided: no totals labels
+            markets_list.append(m)
+        batch = label_matchups_batch(markets_list)
+        for m, got in zip(markets_list, batch):
+            want = scalar_labels(m)
+            self.assertEqual(got.keys(), want.keys(), m)
+            for k, v in want.items():
+                if isinstance(v, float):
+                    self.assertAlmostEqual(got[k], v, places=12, msg=m)
+                else:
+                    self.assertEqual(got[k], v, m)
+
+    def test_high_scoring_threshold_uses_unrounded_prob(self):
+        # fair over prob 0.54995...: rounds to 0.55 at 4dp but is below it
+        over, under = -102, 142
+        p = _prob(over) / (_prob(over) + _prob(under))
+        self.assertLess(p, HIGH_SCORING_PROB)
+        self.assertEqual(round(p, 4), HIGH_SCORING_PROB)
+        self.assertFalse(label_matchups_from_featured({"totals": {"over": over, "under": under}})["high_scoring"])
+
+    def test_zero_odds_get_no_labels(self):
+        out = label_matchups_from_featured({"h2h": {"home": 0, "away": -120},
+                                            "totals": {"over": -110, "under": 0}})
+        self.assertEqual(out, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
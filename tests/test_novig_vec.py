@@ -0,0 +1,70 @@
+import os
+import random
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ev_kernel import fair_two_way
+from novig import american_to_prob, american_to_prob_vec, novig_two_way, novig_two_way_vec
+from novig_multi import prob_to_american
+
+
+def _odds(rnd, n):
+    # every integer price is a LUT hit in american_to_prob; 0 is "missing"
+    return [rnd.choice([0, rnd.randint(-2000, -100), rnd.randint(100, 2000), -110, 100])
+            for _ in range(n)]
+
+
+def _arr(odds):
+    return np.array([float(o) if o else np.nan for o in odds])
+
+
+class NovigVecTest(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(3)
+        self.over = _odds(rnd, 5000)
+        self.under = _odds(rnd, 5000)
+
+    def test_american_to_prob_vec_matches_scalar(self):
+        got = american_to_prob_vec(_arr(self.over))
+        for o, p in zip(self.over, got.tolist()):
+            want = american_to_prob(o)
+            if want is None:
+                self.assertTrue(np.isnan(p), o)
+            else:
+                self.assertEqual(p, want, o)
+
+    def test_novig_two_way_vec_matches_scalar(self):
+        fo, fu = novig_two_way_vec(_arr(self.over), _arr(self.under))
+        for o, u, a, b in zip(self.over, self.under, fo.tolist(), fu.tolist()):
+            wo, wu = novig_two_way(o, u)
+            if wo is None:
+                self.assertTrue(np.isnan(a) and np.isnan(b), (o, u))
+            else:
+                self.assertAlmostEqual(a, wo, places=12, msg=(o, u))
+                self.assertAlmostEqual(b, wu, places=12, msg=(o, u))
+
+    def test_fair_two_way_matches_scalar(self):
+        over, under = _arr(self.over), _arr(self.under)
+        n = len(over)
+        fo, fu, po, pu = (np.empty(n) for _ in range(4))
+        fo_am, fu_am = np.empty(n, dtype=np.int64), np.empty(n, dtype=np.int64)
+        fair_two_way(over, under, fo, fu, po, pu, fo_am, fu_am)
+        for i, (o, u) in enumerate(zip(self.over, self.under)):
+            wo, wu = novig_two_way(o, u)
+            if wo is None:
+                self.assertTrue(np.isnan(fo[i]) and np.isnan(fu[i]), (o, u))
+                self.assertEqual((fo_am[i], fu_am[i]), (0, 0))
+                continue
+            self.assertEqual((po[i], pu[i]), (american_to_prob(o), american_to_prob(u)))
+            self.assertAlmostEqual(fo[i], wo, places=12, msg=(o, u))
+            self.assertAlmostEqual(fu[i], wu, places=12, msg=(o, u))
+            self.assertEqual(fo_am[i], prob_to_american(wo), (o, u))
+            self.assertEqual(fu_am[i], prob_to_american(wu), (o, u))
+
+
+if __name__ == "__main__":
+    unittest.main()
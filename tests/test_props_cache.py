@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import enrichment
+
+
+class PropsCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._db, self._path = enrichment._props_db, enrichment.PROPS_CACHE_DB
+        enrichment._props_db = None
+        enrichment.PROPS_CACHE_DB = os.path.join(self.tmp.name, "props.sqlite")
+
+    def tearDown(self):
+        if enrichment._props_db is not None:
+            enrichment._props_db.close()
+        enrichment._props_db, enrichment.PROPS_CACHE_DB = self._db, self._path
+        self.tmp.cleanup()
+
+    def _rows(self):
+        return enrichment._props_cache_db().execute("SELECT COUNT(*) FROM prop_rows").fetchone()[0]
+
+    def test_round_trip_keeps_every_row(self):
+        with open(os.path.join(ROOT, "mlb_props_cache.json")) as f:
+            props = json.load(f)
+        self.assertTrue(enrichment.cache_props_to_file(props))
+        self.assertEqual(enrichment.load_props_from_file(), props)
+
+    def test_over_under_rows_with_same_fields_both_survive(self):
+        props = [
+            {"player": "A", "stat": "batter_hits", "line": 0.5, "odds": -150, "bookmaker": "FanDuel"},
+            {"player": "A", "stat": "batter_hits", "line": 0.5, "odds": 120, "bookmaker": "FanDuel"},
+        ]
+        enrichment.cache_props_to_file(props)
+        self.assertEqual(enrichment.load_props_from_file(), props)
+
+    def test_save_drops_props_left_off_the_board(self):
+        a, b, c = ({"id": i, "odds": 100 + i} for i in range(3))
+        enrichment.cache_props_to_file([a, b, c])
+        enrichment.cache_props_to_file([c, a])
+        self.assertEqual(enrichment.load_props_from_file(), [c, a])
+        self.assertEqual(self._rows(), 2)
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        props = [{"id": i, "odds": 100 + i} for i in range(50)]
+        enrichment.cache_props_to_file(props)
+        db = enrichment._props_cache_db()
+        before = db.total_changes
+        props[7] = {"id": 7, "odds": -999}
+        enrichment.cache_props_to_file(props)
+        # one changed row + the prop_meta timestamp
+        self.assertEqual(db.total_changes - before, 2)
+        self.assertEqual(enrichment.load_props_from_file()[7], {"id": 7, "odds": -999})
+
+    def test_expired_snapshot_falls_back_to_json(self):
+        enrichment.cache_props_to_file([{"id": 1}])
+        db = enrichment._props_cache_db()
+        with db:
+            db.execute("UPDATE prop_meta SET saved_at = 0")
+        missing = os.path.join(self.tmp.name, "none.json")
+        orig = enrichment._read_json_cache
+        enrichment._read_json_cache = lambda _name: orig(missing)
+        try:
+            self.assertEqual(enrichment.load_props_from_file(), [])
+        finally:
+            enrichment._read_json_cache = orig
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,13 @@
 import os, json, time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Optional, Dict, Callable
+try:
+    import orjson
+    def _dumps(v: Any) -> bytes: return orjson.dumps(v, option=orjson.OPT_NON_STR_KEYS)
+    _loads = orjson.loads  # parses bytes directly, no str decode pass
+except Exception:  # stdlib fallback
+    def _dumps(v: Any) -> bytes: return json.dumps(v).encode("utf-8")
+    _loads = json.loads
 try:
     from zoneinfo import ZoneInfo
 except Exception:
@@ -15,7 +22,7 @@ _redis = None
 if REDIS_URL:
     try:
         import redis
-        _redis = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+        _redis = redis.Redis.from_url(REDIS_URL)  # bytes mode: values go straight to _loads
     except Exception:
         _redis = None
 
@@ -64,16 +71,16 @@ def slot_key(namespace: str, league: str, suffix: str = "") -> str:
 def get_json(key: str) -> Optional[Any]:
     if _redis:
         raw = _redis.get(key)
-        return json.loads(raw) if raw else None
+        return _loads(raw) if raw else None
     rec = _mem.get(key)
     if rec and rec["exp"] > time.time():
-        return json.loads(rec["val"])
+        return _loads(rec["val"])
     return None
 
 def set_json(key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
     _, next_b = current_slot()
     ttl = ttl_seconds if ttl_seconds is not None else _ttl_to_next_boundary(next_b)
-    raw = json.dumps(value)
+    raw = _dumps(value)
     if _redis:
         _redis.setex(key, ttl, raw)
     else: